@@ -0,0 +1,194 @@
+import threading
+from datetime import datetime, timedelta
+import numpy as np
+from sqlalchemy.orm import Session
+
+from . import crud, models
+
+# Hourly error analytics: each hourly table is held in memory as plain NumPy columns
+# (the dates a write touched are re-read after it), windows are sliced by timestamp,
+# predictions are aligned with actuals in NumPy and scored in a handful of vectorized
+# reductions.
+
+PREDICTION_TABLES = {"lstm": models.LSTMPrediction, "lgbm": models.LGBMPrediction}
+VARIABLES = ("ghi", "power")
+
+# Below this clear-sky GHI (W/m2) the hour counts as night: excluded with daytime_only,
+# and the clear-sky index used by the persistence reference is undefined.
+CLEAR_SKY_MIN = 10.0
+SECONDS_PER_DAY = 86400
+
+SERIES_COLUMNS = ("ghi", "power", "clear_ghi")
+
+_series_cache = {}
+_series_lock = threading.Lock()
+
+def load_series(db: Session, model, start_date=None, end_date=None):
+    """Hourly table as {"ts": epoch seconds, column: ndarray}, ordered by timestamp.
+
+    Reads through the raw DB-API cursor with SQLite converting timestamps to integers
+    (naive local time read as UTC, which keeps hour-of-day intact): no ORM rows or
+    datetime objects are built, which is most of the cost for years of hours. With
+    start_date/end_date only the rows of those local dates are read.
+    """
+    columns = ", ".join(SERIES_COLUMNS)
+    where, params = "", ()
+    if start_date is not None:
+        where = "WHERE timestamp >= ? AND timestamp < ?"
+        params = (
+            datetime.combine(start_date, datetime.min.time()).isoformat(" "),
+            datetime.combine(end_date + timedelta(days=1), datetime.min.time()).isoformat(" "),
+        )
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.execute(
+            f'SELECT CAST(strftime(\'%s\', timestamp) AS INTEGER), {columns} '
+            f'FROM "{model.__tablename__}" {where} ORDER BY timestamp',
+            params,
+        )
+        rows = cursor.fetchall()
+    finally:
+        cursor.close()
+    data = np.array(rows, dtype=np.float64).reshape(len(rows), len(SERIES_COLUMNS) + 1)
+    series = {"ts": data[:, 0].astype(np.int64)}
+    for i, name in enumerate(SERIES_COLUMNS, start=1):
+        series[name] = data[:, i]
+    return series
+
+def _day_bounds(start_date, end_date):
+    # Epoch seconds of start_date 00:00 and of the day after end_date, as load_series stores them
+    epoch = datetime(1970, 1, 1)
+    lo = int((datetime.combine(start_date, datetime.min.time()) - epoch).total_seconds())
+    hi = int((datetime.combine(end_date + timedelta(days=1), datetime.min.time()) - epoch).total_seconds())
+    return lo, hi
+
+def _splice(db: Session, model, series, ranges):
+    """Copy of series with the rows of each (first, last) date range re-read from the table."""
+    for first, last in ranges:
+        fresh = load_series(db, model, first, last)
+        i, j = np.searchsorted(series["ts"], _day_bounds(first, last))
+        series = {name: np.concatenate([values[:i], fresh[name], values[j:]]) for name, values in series.items()}
+    return series
+
+def table_series(db: Session, model):
+    """load_series, cached in memory per table.
+
+    A commit that wrote this table only re-reads the dates it wrote; writes to other
+    tables leave the cached series alone.
+    """
+    name = model.__tablename__
+    cached = _series_cache.get(name)
+    if cached is None:
+        version, ranges = crud.table_changes(name, 0)[0], None
+    else:
+        version, ranges = crud.table_changes(name, cached[0])
+        if ranges == []:
+            return cached[1]
+    series = load_series(db, model) if ranges is None else _splice(db, model, cached[1], ranges)
+    with _series_lock:
+        _series_cache[name] = (version, series)
+    return series
+
+def window(series, start_date, end_date):
+    """Rows of a series whose local date lies in [start_date, end_date]."""
+    i, j = np.searchsorted(series["ts"], _day_bounds(start_date, end_date))
+    return {name: values[i:j] for name, values in series.items()}
+
+def align(ts_a, ts_b):
+    """Indices into two sorted, unique timestamp arrays where they coincide."""
+    _, idx_a, idx_b = np.intersect1d(ts_a, ts_b, assume_unique=True, return_indices=True)
+    return idx_a, idx_b
+
+def persistence_reference(actual):
+    """Clear-sky persistence: yesterday's clear-sky index at the same hour times today's clear-sky GHI.
+
+    Returns {variable: reference ndarray} aligned with `actual`; NaN where the hour 24h
+    earlier is missing.
+    """
+    ts = actual["ts"]
+    if len(ts) == 0:
+        return {name: np.full(0, np.nan) for name in VARIABLES}
+    clear = actual["clear_ghi"]
+    prev = np.minimum(np.searchsorted(ts, ts - SECONDS_PER_DAY), len(ts) - 1)
+    found = ts[prev] == ts - SECONDS_PER_DAY
+    prev_clear = clear[prev]
+    day = found & (prev_clear >= CLEAR_SKY_MIN)
+
+    reference = {}
+    for name in VARIABLES:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            index = np.where(day, actual[name][prev] / prev_clear, 0.0)
+        reference[name] = np.where(found, index * clear, np.nan)
+    return reference
+
+def _profile(values, keys, size):
+    """Mean of values per integer key in [0, size); None where a key has no samples."""
+    counts = np.bincount(keys, minlength=size)
+    sums = np.bincount(keys, weights=values, minlength=size)
+    return [float(s / c) if c else None for s, c in zip(sums, counts)]
+
+def _nan_float(value):
+    return float(value) if np.isfinite(value) else None
+
+def error_metrics(pred, obs, ref, hours, months):
+    """MAE, RMSE, nMBE (% of mean observed), skill vs reference and hour/month profiles."""
+    valid = np.isfinite(pred) & np.isfinite(obs)
+    if not valid.all():
+        pred, obs, ref, hours, months = pred[valid], obs[valid], ref[valid], hours[valid], months[valid]
+    n = len(obs)
+    if n == 0:
+        return {"n": 0}
+    err = pred - obs
+    abs_err = np.abs(err)
+    mae = abs_err.mean()
+    rmse = np.sqrt(np.mean(err * err))
+    mean_obs = obs.mean()
+
+    has_ref = ~np.isnan(ref)
+    skill = None
+    if has_ref.any():
+        rmse_model = np.sqrt(np.mean(err[has_ref] ** 2))
+        ref_err = ref[has_ref] - obs[has_ref]
+        rmse_ref = np.sqrt(np.mean(ref_err * ref_err))
+        skill = _nan_float(1 - rmse_model / rmse_ref) if rmse_ref > 0 else None
+
+    return {
+        "n": int(n),
+        "mae": float(mae),
+        "rmse": float(rmse),
+        "nmbe_pct": _nan_float(100 * err.mean() / mean_obs) if mean_obs else None,
+        "skill_vs_persistence": skill,
+        "hourly_mae": _profile(abs_err, hours, 24),
+        "hourly_bias": _profile(err, hours, 24),
+        "monthly_mae": _profile(abs_err, months, 12),
+        "monthly_bias": _profile(err, months, 12),
+    }
+
+def hourly_error_report(db: Session, start_date, end_date, daytime_only=True):
+    """Hourly GHI and power error analytics of each prediction table against actuals."""
+    actual = window(table_series(db, models.ActualData), start_date, end_date)
+    reference = persistence_reference(actual)
+    hours_all = (actual["ts"] // 3600 % 24).astype(np.int64)
+    months_all = (actual["ts"].astype("datetime64[s]").astype("datetime64[M]").astype(np.int64) % 12).astype(np.int64)
+
+    report = {
+        "start": start_date.isoformat(),
+        "end": end_date.isoformat(),
+        "daytime_only": daytime_only,
+        "actual_hours": int(len(actual["ts"])),
+        "models": {},
+    }
+    for name, model in PREDICTION_TABLES.items():
+        pred = window(table_series(db, model), start_date, end_date)
+        idx_pred, idx_obs = align(pred["ts"], actual["ts"])
+        if daytime_only:
+            keep = actual["clear_ghi"][idx_obs] >= CLEAR_SKY_MIN
+            idx_pred, idx_obs = idx_pred[keep], idx_obs[keep]
+        hours, months = hours_all[idx_obs], months_all[idx_obs]
+        report["models"][name] = {
+            variable: error_metrics(
+                pred[variable][idx_pred], actual[variable][idx_obs], reference[variable][idx_obs], hours, months
+            )
+            for variable in VARIABLES
+        }
+    return report
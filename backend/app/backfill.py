@@ -0,0 +1,482 @@
+import contextvars
+import logging
+import os
+import queue
+import threading
+import time
+from contextlib import nullcontext
+from datetime import datetime, timedelta
+import pandas as pd
+from sqlalchemy.orm import Session
+
+from . import crud, inference, metrics, profiling, weather
+from .database import SessionLocal
+
+PROJECT_START_DATE = datetime(2026, 1, 1)
+
+class BackfillProgress:
+    """Thread-safe progress of the background backfill, read by the status endpoint.
+
+    days_total/days_done count table-days, i.e. one day of one table (actual, lstm or lgbm).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.state = "pending"
+        self.stage = None
+        self.days_total = 0
+        self.days_done = 0
+        self.current_date = None
+        self.started_at = None
+        self.finished_at = None
+        self.error = None
+
+    def advance(self, days, current_date=None):
+        """Count `days` more table-days as handled (written or given up on)."""
+        with self._lock:
+            self.days_done += days
+            if current_date is not None:
+                self.current_date = current_date
+
+    def update(self, **fields):
+        with self._lock:
+            for key, value in fields.items():
+                setattr(self, key, value)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "state": self.state,
+                "stage": self.stage,
+                "days_total": self.days_total,
+                "days_done": self.days_done,
+                "days_remaining": self.days_total - self.days_done,
+                "current_date": self.current_date.isoformat() if self.current_date else None,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+                "error": self.error,
+            }
+
+progress = BackfillProgress()
+
+# Each model kind is loaded on its own, so a broken artifact of one kind (say the LGBM
+# pickle) leaves the other kind and the actuals backfill running. models_loaded[kind] is
+# set once the active model of that kind is loaded; models_error holds the last load
+# error per kind. Kinds that failed are retried every BACKFILL_MODEL_RETRY_SECONDS, or
+# right away after retry_models() (called when a model is loaded or promoted).
+MODEL_KINDS = ("lstm", "lgbm")
+BACKFILL_MODEL_RETRY_SECONDS = float(os.getenv("BACKFILL_MODEL_RETRY_SECONDS", "300"))
+models_loaded = {kind: threading.Event() for kind in MODEL_KINDS}
+models_error = {}
+_models_retry = threading.Event()
+
+def warm_models():
+    """Load the active model of every kind not loaded yet; returns the kinds that are loaded.
+
+    With inference workers the models are loaded in the workers.
+    """
+    from .registry import registry
+    if inference.enabled():
+        try:
+            inference.warm()
+        except Exception as e:
+            logging.exception("Starting inference workers failed")
+            for kind in MODEL_KINDS:
+                if not models_loaded[kind].is_set():
+                    models_error[kind] = f"inference workers failed to start: {e}"
+            return [kind for kind in MODEL_KINDS if models_loaded[kind].is_set()]
+    for kind in MODEL_KINDS:
+        if models_loaded[kind].is_set():
+            continue
+        name = registry.active_name(kind)
+        try:
+            inference.load_model(name)
+        except Exception as e:
+            logging.error(f"Loading {kind} model {name} failed: {e}")
+            models_error[kind] = f"{name}: {e}"
+            continue
+        models_error.pop(kind, None)
+        models_loaded[kind].set()
+    return [kind for kind in MODEL_KINDS if models_loaded[kind].is_set()]
+
+def retry_models():
+    """Retry loading the kinds that failed, and backfill them, without waiting for the timer."""
+    _models_retry.set()
+
+# Backfill pipeline: windows of consecutive days flow through fetch -> features ->
+# inference -> write, each stage on its own threads with bounded queues in between, so
+# Open-Meteo requests, pvlib, the models and SQLite all work at the same time.
+BACKFILL_FETCH_WORKERS = int(os.getenv("BACKFILL_FETCH_WORKERS", "4"))
+BACKFILL_RATE_PER_MINUTE = float(os.getenv("BACKFILL_RATE_PER_MINUTE", "120"))
+BACKFILL_CHUNK_DAYS = int(os.getenv("BACKFILL_CHUNK_DAYS", "14"))
+BACKFILL_RETRIES = int(os.getenv("BACKFILL_RETRIES", "3"))
+BACKFILL_BACKOFF_SECONDS = float(os.getenv("BACKFILL_BACKOFF_SECONDS", "2"))
+BACKFILL_QUEUE_SIZE = int(os.getenv("BACKFILL_QUEUE_SIZE", "4"))
+
+# Tables produced from each weather source
+SOURCE_TABLES = {"forecast": ("lstm", "lgbm"), "archive": ("actual",)}
+
+def lstm_lookback_days():
+    """Forecast days before an LSTM run that the active version's input sequences reach back into."""
+    from .registry import registry
+    return -(-registry.lstm_seq_len(registry.active_name("lstm")) // 24)
+
+class TokenBucket:
+    """Blocking rate limiter: `rate` tokens per second, bursts of up to `capacity`."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+class Window:
+    """Consecutive days of the backfill plan and the table-days missing in them."""
+
+    def __init__(self, start, end, days):
+        self.start = start
+        self.end = end
+        self.days = days  # table name -> sorted dates
+        self.raw = {}  # source -> weather frame as fetched
+        self.frames = {}  # source -> solar-enriched frame
+        self.results = []  # (table name, run start, run end, hourly frame)
+        self.table_days = sum(len(d) for d in days.values())
+        self.accounted = 0  # table-days already counted in progress
+
+    def __str__(self):
+        return f"{self.start}" if self.start == self.end else f"{self.start} -> {self.end}"
+
+    def fetch_ranges(self, lookback):
+        """{source: (first date, last date)} of the weather this window needs.
+
+        LSTM days need forecast weather from `lookback` days before them.
+        """
+        ranges = {}
+        if self.days.get("lstm") or self.days.get("lgbm"):
+            first = self.start - timedelta(days=lookback) if self.days.get("lstm") else self.start
+            ranges["forecast"] = (first, self.end)
+        if self.days.get("actual"):
+            ranges["archive"] = (self.days["actual"][0], self.days["actual"][-1])
+        return ranges
+
+    def drop(self, source, day, lookback):
+        """Give up on the table-days that need `source` weather for `day`; returns how many.
+
+        Without forecast weather for `day`, the LSTM days whose lookback covers it
+        (day + 1 through day + lookback) cannot be scored either.
+        """
+        needs = {name: [day] for name in SOURCE_TABLES[source]}
+        if source == "forecast":
+            needs["lstm"] = [day + timedelta(days=i) for i in range(lookback + 1)]
+        dropped = 0
+        for name, days in needs.items():
+            for needed in days:
+                if needed in self.days.get(name, []):
+                    self.days[name].remove(needed)
+                    dropped += 1
+        return dropped
+
+def plan_windows(plan, chunk_days=BACKFILL_CHUNK_DAYS):
+    """Group (table name, date) pairs into windows of at most chunk_days consecutive days.
+
+    Weather is fetched per window rather than in one request per source covering the
+    whole span: a window's inference and writes can start while later windows are
+    still being fetched, only a few windows of frames are held in memory at once, and
+    a failed request loses (and retries) one window instead of the whole backfill.
+    """
+    by_day = {}
+    for name, day in plan:
+        by_day.setdefault(day, []).append(name)
+    windows = []
+    for run_start, run_end in contiguous_runs(sorted(by_day)):
+        start = run_start
+        while start <= run_end:
+            end = min(start + timedelta(days=chunk_days - 1), run_end)
+            days = {}
+            day = start
+            while day <= end:
+                for name in by_day[day]:
+                    days.setdefault(name, []).append(day)
+                day += timedelta(days=1)
+            windows.append(Window(start, end, days))
+            start = end + timedelta(days=1)
+    return windows
+
+_DONE = object()
+
+def run_pipeline(items, stages, queue_size=BACKFILL_QUEUE_SIZE, on_error=None):
+    """Pass items through stages [(name, fn, workers)], each on its own worker threads.
+
+    fn(item) returns a list of items for the next stage (empty to drop the item).
+    Stages are linked by queues of queue_size, so a slow stage holds back the ones
+    before it instead of letting fetched data pile up. An exception drops only the
+    item that raised it, after calling on_error(stage name, item, exception).
+    """
+    queues = [queue.Queue(maxsize=queue_size) for _ in stages] + [None]
+
+    def work(i, name, fn):
+        inbox, outbox = queues[i], queues[i + 1]
+        while True:
+            item = inbox.get()
+            if item is _DONE:
+                inbox.put(_DONE)  # for this stage's other workers
+                return
+            try:
+                results = fn(item)
+            except Exception as e:
+                logging.error(f"Backfill {name} failed for {item}: {e}")
+                if on_error is not None:
+                    on_error(name, item, e)
+                continue
+            if outbox is not None:
+                for result in results:
+                    outbox.put(result)
+
+    threads = []
+    for i, (name, fn, workers) in enumerate(stages):
+        # Each thread runs in a copy of this context, so a profile captured around the
+        # pipeline also covers the inference calls its threads make
+        stage_threads = [
+            threading.Thread(
+                target=contextvars.copy_context().run, args=(work, i, name, fn),
+                name=f"backfill-{name}-{n}", daemon=True)
+            for n in range(workers)
+        ]
+        for thread in stage_threads:
+            thread.start()
+        threads.append(stage_threads)
+
+    for item in items:
+        queues[0].put(item)
+    queues[0].put(_DONE)
+    # A stage is finished once its workers have exited; then the next one can be told
+    for i, stage_threads in enumerate(threads):
+        for thread in stage_threads:
+            thread.join()
+        if queues[i + 1] is not None:
+            queues[i + 1].put(_DONE)
+
+def _with_retries(fn, bucket, label):
+    """Call fn under the rate limit, retrying failures with exponential backoff."""
+    for attempt in range(BACKFILL_RETRIES + 1):
+        bucket.acquire()
+        try:
+            return fn()
+        except Exception as e:
+            if attempt == BACKFILL_RETRIES:
+                raise
+            delay = BACKFILL_BACKOFF_SECONDS * 2 ** attempt
+            logging.warning(f"{label} failed ({e}); retry {attempt + 1}/{BACKFILL_RETRIES} in {delay:.0f}s")
+            time.sleep(delay)
+
+def _fetch(source, first, last, bucket):
+    return _with_retries(
+        lambda: weather.fetch_weather_data(
+            weather.LAT, weather.LON, first.strftime("%Y-%m-%d"), last.strftime("%Y-%m-%d"),
+            use_archive=(source == "archive")),
+        bucket, f"Fetching {source} {first} -> {last}")
+
+def _complete(df, first, last):
+    # A short slice means the response did not cover this run
+    rows = weather.slice_days(df, first, last)
+    if len(rows) != ((last - first).days + 1) * 24:
+        raise ValueError(f"weather for {first} -> {last} is incomplete ({len(rows)} rows)")
+    return rows.copy()
+
+def backfill_data(db: Session, progress=progress, tables=None):
+    """Populate database for both LSTM and LGBM from PROJECT_START_DATE to Tomorrow.
+
+    tables limits the backfill to those table names, e.g. to the kinds whose models loaded.
+    """
+    prediction = inference.prediction_proxy
+    start_date = PROJECT_START_DATE.date()
+    end_date = (datetime.now() + timedelta(days=1)).date()
+
+    progress.update(stage="planning")
+    plan = crud.plan_backfill(db, start_date, end_date)
+    if tables is not None:
+        plan = [(name, day) for name, day in plan if name in tables]
+    progress.update(days_total=len(plan), days_done=0)
+    if not plan:
+        logging.info("Backfill: database is up to date")
+        return
+    windows = plan_windows(plan)
+    lookback = lstm_lookback_days() if any(name == "lstm" for name, _ in plan) else 0
+    logging.info(f"Backfill: {len(plan)} missing table-days between {plan[0][1]} and {plan[-1][1]} in {len(windows)} windows")
+    progress.update(stage="pipeline")
+
+    bucket = TokenBucket(BACKFILL_RATE_PER_MINUTE / 60, max(1, BACKFILL_FETCH_WORKERS))
+    failed_windows = []
+
+    def advance(window, days, current_date=None):
+        window.accounted += days
+        progress.advance(days, current_date=current_date)
+
+    def window_failed(stage, window, error):
+        # The window's table-days not yet counted are given up on, and the run reports it
+        advance(window, window.table_days - window.accounted)
+        failed_windows.append(window)
+        progress.update(error=f"Backfill {stage} failed for {len(failed_windows)} window(s); last {window}: {error}")
+
+    def fetch(window):
+        for source, (first, last) in window.fetch_ranges(lookback).items():
+            try:
+                window.raw[source] = _fetch(source, first, last, bucket)
+                continue
+            except Exception as e:
+                logging.warning(f"Backfill {source} fetch failed for {first} -> {last}: {e}; retrying day by day")
+            # Day by day, so a date that keeps failing only loses its own rows
+            parts = []
+            day = first
+            while day <= last:
+                try:
+                    parts.append(_fetch(source, day, day, bucket))
+                except Exception as e:
+                    logging.error(f"Backfill {source} fetch failed for {day}: {e}")
+                    advance(window, window.drop(source, day, lookback))
+                day += timedelta(days=1)
+            if parts:
+                window.raw[source] = pd.concat(parts, ignore_index=True)
+        return [window]
+
+    def add_features(window):
+        from .utils import add_solar_features_ist
+        for source, raw in window.raw.items():
+            window.frames[source] = add_solar_features_ist(raw, weather.LAT, weather.LON)
+        window.raw = {}
+        return [window]
+
+    # LSTM and LGBM score each run of missing days in one batched call
+    def produce(name, window, start, end):
+        start_str, end_str = start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d")
+        if name == "lstm":
+            weather_df = _complete(window.frames["forecast"], start - timedelta(days=lookback), end)
+            return prediction.predict_lstm_for_range(start_str, end_str, weather_df=weather_df)
+        if name == "lgbm":
+            return prediction.predict_lgbm_for_range(
+                start_str, end_str, weather_df=_complete(window.frames["forecast"], start, end))
+        return prediction.fetch_actual_data_for_day(start_str, weather_df=_complete(window.frames["archive"], start, end))
+
+    def drop_incomplete(window):
+        # Days the fetch lost or returned short are dropped with the LSTM days depending on
+        # them, so the remaining days split into runs that can still be scored
+        for source, (first, last) in window.fetch_ranges(lookback).items():
+            frame = window.frames.get(source)
+            hours = pd.Series(frame.index.date).value_counts() if frame is not None else {}
+            day = first
+            while day <= last:
+                if hours.get(day, 0) != 24:
+                    advance(window, window.drop(source, day, lookback))
+                day += timedelta(days=1)
+
+    def infer(window):
+        drop_incomplete(window)
+        for name in crud.BACKFILL_TABLES:
+            for start, end in contiguous_runs(window.days.get(name, [])):
+                try:
+                    window.results.append((name, start, end, produce(name, window, start, end)))
+                except Exception as e:
+                    logging.error(f"{name.upper()} Error {start} -> {end}: {e}")
+                    advance(window, (end - start).days + 1)
+        window.frames = {}
+        return [window]
+
+    def write(window):
+        # Single writer: SQLite takes one write transaction at a time
+        for name, start, end, results in window.results:
+            try:
+                with metrics.timed("db_write", rows=len(results)):
+                    crud.write_hourly_frame(db, crud.BACKFILL_TABLES[name], results)
+                    db.commit()
+            except Exception as e:
+                logging.error(f"{name.upper()} Error {start} -> {end}: {e}")
+                db.rollback()
+            advance(window, (end - start).days + 1, current_date=window.start)
+        return []
+
+    run_pipeline(windows, [
+        ("fetch", fetch, BACKFILL_FETCH_WORKERS),
+        ("features", add_features, 1),
+        ("inference", infer, max(1, inference.INFERENCE_WORKERS)),
+        ("write", write, 1),
+    ], on_error=window_failed)
+
+def refresh_lstm_forecasts(days_ahead=1):
+    """Re-score today through today + days_ahead with the active LSTM and overwrite stored rows."""
+    today = datetime.now().date()
+    end = today + timedelta(days=days_ahead)
+    db = SessionLocal()
+    try:
+        results = inference.run("predict_lstm_for_range", today.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d"))
+        with metrics.timed("db_write", rows=len(results)):
+            crud.write_hourly_frame(db, crud.BACKFILL_TABLES["lstm"], results, replace=True)
+            db.commit()
+        logging.info(f"Refreshed LSTM forecasts {today} -> {end}")
+    except Exception as e:
+        logging.error(f"LSTM forecast refresh failed: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+def contiguous_runs(days):
+    """Group sorted dates into inclusive (start, end) runs of consecutive days."""
+    runs = []
+    for day in days:
+        if runs and day == runs[-1][1] + timedelta(days=1):
+            runs[-1] = (runs[-1][0], day)
+        else:
+            runs.append((day, day))
+    return runs
+
+def _backfill(tables):
+    progress.update(state="running", error=None, finished_at=None)
+    db = SessionLocal()
+    try:
+        with profiling.capture("backfill") if profiling.PROFILE_BACKFILL else nullcontext():
+            backfill_data(db, tables=tables)
+        progress.update(state="done", stage=None, current_date=None)
+    except Exception as e:
+        logging.exception("Backfill failed")
+        progress.update(state="failed", error=str(e))
+    finally:
+        db.close()
+        progress.update(finished_at=datetime.now())
+    # A cold backfill can add many responses to the HTTP cache
+    weather.enforce_http_cache_limit()
+
+def _run():
+    progress.update(state="loading_models", started_at=datetime.now())
+    backfilled = None
+    backfill_error = None
+    while True:
+        _models_retry.clear()
+        loaded = warm_models()
+        # Actuals need no model; each prediction table needs its kind's model
+        if loaded != backfilled:
+            _backfill({"actual", *loaded})
+            backfilled = loaded
+            backfill_error = progress.error
+        if len(loaded) == len(MODEL_KINDS):
+            return
+        models_failed = f"Model loading failed ({'; '.join(models_error.values())}); retrying"
+        progress.update(error=f"{backfill_error}; {models_failed}" if backfill_error else models_failed)
+        _models_retry.wait(BACKFILL_MODEL_RETRY_SECONDS)
+
+def start_background_backfill():
+    """Load models and run backfill on a daemon thread so the API can start serving immediately."""
+    thread = threading.Thread(target=_run, name="backfill", daemon=True)
+    thread.start()
+    return thread
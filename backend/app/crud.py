@@ -0,0 +1,248 @@
+import threading
+from datetime import date, datetime, timedelta
+import pandas as pd
+from sqlalchemy import case, event, func, literal, select, true, union_all
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from . import models
+
+# Frame columns stored as-is in every hourly table
+HOURLY_COLUMNS = [
+    "temperature", "humidity", "wind_speed", "wind_direction", "surface_pressure",
+    "cloud_cover", "water_vapour", "dni", "dhi", "power", "kt", "solar_zenith",
+    "cos_zenith", "clear_ghi", "ghi_clear_weighted", "hour_sin", "hour_cos",
+    "day_sin", "day_cos"
+]
+
+# Frame column written to the `ghi` column of each hourly table
+GHI_SOURCE = {
+    models.ActualData: "ghi",
+    models.LSTMPrediction: "ghi_pred",
+    models.LGBMPrediction: "ghi_pred",
+}
+
+# Hourly tables maintained by backfill, keyed by the name used in work plans
+BACKFILL_TABLES = {
+    "actual": models.ActualData,
+    "lstm": models.LSTMPrediction,
+    "lgbm": models.LGBMPrediction,
+}
+
+# Incremented after every commit that wrote hourly rows; in-process caches of hourly
+# data compare it to decide whether they are stale.
+data_version = 0
+_data_version_lock = threading.Lock()
+
+# The same per hourly table, with the date ranges each commit wrote, so a cache of one
+# table can skip writes to the others and re-read only the written days. Only the last
+# TABLE_CHANGE_LOG commits per table are kept; older versions must reload everything.
+TABLE_CHANGE_LOG = 64
+table_versions = {}
+_table_changes = {}  # tablename -> [(version, [(first date, last date), ...])]
+
+@event.listens_for(Session, "after_commit")
+def _bump_data_version(session):
+    global data_version
+    written = session.info.pop("hourly_written", None)
+    if written:
+        with _data_version_lock:
+            data_version += 1
+            for tablename, ranges in written.items():
+                version = table_versions.get(tablename, 0) + 1
+                table_versions[tablename] = version
+                changes = _table_changes.setdefault(tablename, [])
+                changes.append((version, ranges))
+                del changes[:-TABLE_CHANGE_LOG]
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_write(session):
+    session.info.pop("hourly_written", None)
+
+def table_changes(tablename, since):
+    """(current version of the table, [(first, last) date ranges written after `since`]).
+
+    The ranges are None when `since` is older than the change log, i.e. the caller
+    cannot tell what changed and has to reload the table.
+    """
+    with _data_version_lock:
+        version = table_versions.get(tablename, 0)
+        changes = [ranges for v, ranges in _table_changes.get(tablename, ()) if v > since]
+    if len(changes) < version - since:
+        return version, None
+    return version, [day_range for ranges in changes for day_range in ranges]
+
+# Name used for each hourly table in plans and rollups
+TABLE_NAMES = {model: name for name, model in BACKFILL_TABLES.items()}
+
+def covered_dates(db: Session, start_date, end_date):
+    """Map each backfill table name to the set of dates in [start_date, end_date] with at least one row.
+
+    All three tables are read in a single UNION ALL of per-table GROUP BY date queries.
+    """
+    start_dt = datetime.combine(start_date, datetime.min.time())
+    end_dt = datetime.combine(end_date + timedelta(days=1), datetime.min.time())
+    selects = []
+    for name, model in BACKFILL_TABLES.items():
+        day = func.date(model.timestamp)
+        selects.append(
+            select(literal(name).label("tbl"), day.label("day"))
+            .where(model.timestamp >= start_dt, model.timestamp < end_dt)
+            .group_by(day)
+        )
+
+    covered = {name: set() for name in BACKFILL_TABLES}
+    for tbl, day in db.execute(union_all(*selects)):
+        covered[tbl].add(date.fromisoformat(day))
+    return covered
+
+def plan_backfill(db: Session, start_date, end_date, today=None):
+    """Return the (table name, date) pairs with no rows yet, ordered by date.
+
+    Actuals are only planned up to yesterday since the archive has nothing later.
+    """
+    today = today or datetime.now().date()
+    covered = covered_dates(db, start_date, end_date)
+    plan = []
+    day = start_date
+    while day <= end_date:
+        for name in BACKFILL_TABLES:
+            if name == "actual" and day >= today:
+                continue
+            if day not in covered[name]:
+                plan.append((name, day))
+        day += timedelta(days=1)
+    return plan
+
+def frame_to_records(df, model):
+    """Convert a prediction/actuals frame into insert parameter dicts for `model`'s table."""
+    timestamps = df["timestamp"]
+    if timestamps.dt.tz is not None:
+        # Stored as naive local (IST) time, matching the rest of the database
+        timestamps = timestamps.dt.tz_localize(None)
+
+    # Through DatetimeIndex: Series.dt.to_pydatetime() warns on every call in pandas 2.x
+    columns = {"timestamp": list(pd.DatetimeIndex(timestamps).to_pydatetime())}
+    columns["ghi"] = df[GHI_SOURCE[model]].tolist()
+    for name in HOURLY_COLUMNS:
+        columns[name] = df[name].tolist()
+
+    keys = list(columns)
+    return [dict(zip(keys, values)) for values in zip(*columns.values())]
+
+def write_hourly_frame(db: Session, model, df, replace=False):
+    """Insert every row of a frame in one executemany batch and refresh its daily rollups.
+
+    Rows whose timestamp already exists are skipped, or overwritten when replace=True
+    (e.g. re-scoring forecasts with a newly promoted model). The daily_energy rows for
+    the frame's dates are recomputed in the same transaction. The caller owns the
+    transaction (commit/rollback). Returns the number of rows sent.
+    """
+    records = frame_to_records(df, model)
+    if not records:
+        return 0
+    stmt = insert(model.__table__)
+    if replace:
+        columns = [name for name in records[0] if name != "timestamp"]
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["timestamp"],
+            set_={name: stmt.excluded[name] for name in columns},
+        )
+    else:
+        stmt = stmt.on_conflict_do_nothing(index_elements=["timestamp"])
+    db.execute(stmt, records)
+
+    timestamps = [record["timestamp"] for record in records]
+    first, last = min(timestamps).date(), max(timestamps).date()
+    refresh_daily_energy(db, model, first, last)
+
+    # Date ranges written per table, published to caches when the transaction commits
+    db.info.setdefault("hourly_written", {}).setdefault(model.__tablename__, []).append((first, last))
+    return len(records)
+
+DAILY_COLUMNS = ["date", "model", "total_mwh", "peak_mw", "hours_generating", "ghi_sum", "hours"]
+
+def _daily_rollup_select(model, start_date=None, end_date=None):
+    day = func.date(model.timestamp)
+    stmt = select(
+        day,
+        literal(TABLE_NAMES[model]),
+        func.sum(model.power),
+        func.max(model.power),
+        func.sum(case((model.power > 0, 1), else_=0)),
+        func.sum(model.ghi),
+        func.count(),
+    )
+    if start_date is None:
+        # SQLite needs a WHERE before ON CONFLICT in INSERT ... SELECT to parse the upsert
+        stmt = stmt.where(true())
+    else:
+        stmt = stmt.where(
+            model.timestamp >= datetime.combine(start_date, datetime.min.time()),
+            model.timestamp < datetime.combine(end_date + timedelta(days=1), datetime.min.time()),
+        )
+    return stmt.group_by(day)
+
+def refresh_daily_energy(db: Session, model, start_date=None, end_date=None):
+    """Recompute daily_energy rows for `model` from its hourly table (all days if no range).
+
+    The aggregate reads only the date range through the timestamp index and is upserted
+    with INSERT ... SELECT, so nothing round-trips through Python.
+    """
+    table = models.DailyEnergy.__table__
+    stmt = insert(table).from_select(DAILY_COLUMNS, _daily_rollup_select(model, start_date, end_date))
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["date", "model"],
+        set_={name: stmt.excluded[name] for name in DAILY_COLUMNS[2:]},
+    )
+    db.execute(stmt)
+
+def ensure_daily_energy(db: Session):
+    """Build the rollup once for databases that predate the daily_energy table."""
+    if db.query(models.DailyEnergy.id).first() is not None:
+        return False
+    for model in BACKFILL_TABLES.values():
+        refresh_daily_energy(db, model)
+    db.commit()
+    return True
+
+def daily_energy(db: Session):
+    """Map each table name to {date string: total MWh} from the rollup table."""
+    totals = {name: {} for name in BACKFILL_TABLES}
+    rows = db.query(models.DailyEnergy.date, models.DailyEnergy.model, models.DailyEnergy.total_mwh)
+    for day, name, total in rows:
+        totals[name][day.isoformat()] = total
+    return totals
+
+def energy_totals(db: Session, start_date, end_date):
+    """Total MWh per table over the dates [start_date, end_date], from the rollup table."""
+    totals = {name: 0 for name in BACKFILL_TABLES}
+    rows = db.query(models.DailyEnergy.model, func.sum(models.DailyEnergy.total_mwh)).filter(
+        models.DailyEnergy.date >= start_date,
+        models.DailyEnergy.date <= end_date,
+    ).group_by(models.DailyEnergy.model)
+    for name, total in rows:
+        totals[name] = total
+    return totals
+
+# Columns that can be projected out of an hourly table besides the timestamp
+PROJECTABLE_COLUMNS = ["ghi"] + HOURLY_COLUMNS
+
+def hourly_columns(db: Session, model, start_dt, end_dt, fields):
+    """Timestamps (ISO strings) and {field: list} for `model`'s rows in [start_dt, end_dt].
+
+    A Core select of just the requested columns; SQLite formats the timestamps, so no
+    ORM objects or datetimes are built.
+    """
+    stmt = select(
+        func.strftime("%Y-%m-%dT%H:%M:%S", model.timestamp),
+        *(getattr(model, name) for name in fields),
+    ).where(
+        model.timestamp >= start_dt,
+        model.timestamp <= end_dt,
+    ).order_by(model.timestamp)
+    rows = db.execute(stmt).all()
+    if not rows:
+        return [], {name: [] for name in fields}
+    timestamps, *values = zip(*rows)
+    return list(timestamps), {name: list(column) for name, column in zip(fields, values)}
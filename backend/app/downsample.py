@@ -0,0 +1,70 @@
+import numpy as np
+
+# Point reduction for long chart series. Both methods return indices into the input,
+# so whole rows (or aligned columns) can be picked with them and the kept points are
+# real observations, not averages.
+
+METHODS = ("lttb", "minmax")
+
+def _clean(y):
+    # Missing values (None/NaN) must not decide which points are kept
+    return np.nan_to_num(np.asarray(y, dtype=np.float64))
+
+def lttb_indices(x, y, n):
+    """Largest-Triangle-Three-Buckets: n indices keeping the visual shape of y(x).
+
+    The first and last points are always kept; the rest are split into n - 2 buckets
+    and each bucket keeps the point forming the largest triangle with the previously
+    kept point and the mean of the next bucket. The bucket loop is sequential by
+    definition, the work inside each bucket and all bucket means are vectorized.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = _clean(y)
+    size = len(x)
+    if n >= size or n < 3:
+        return np.arange(size)
+
+    edges = np.linspace(1, size - 1, n - 1).astype(np.int64)
+    counts = np.diff(edges)
+    mean_x = np.add.reduceat(x[:size - 1], edges[:-1]) / counts
+    mean_y = np.add.reduceat(y[:size - 1], edges[:-1]) / counts
+    # Third vertex for bucket i is the mean of bucket i + 1, or the last point
+    next_x = np.append(mean_x[1:], x[-1])
+    next_y = np.append(mean_y[1:], y[-1])
+
+    selected = np.empty(n, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = size - 1
+    a = 0
+    for i in range(n - 2):
+        lo, hi = edges[i], edges[i + 1]
+        area = np.abs(
+            (x[a] - next_x[i]) * (y[lo:hi] - y[a])
+            - (x[a] - x[lo:hi]) * (next_y[i] - y[a])
+        )
+        a = lo + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+def minmax_indices(y, n):
+    """Indices of the minimum and maximum of y in each of n // 2 equal buckets, in order."""
+    y = _clean(y)
+    size = len(y)
+    if n >= size or n < 2:
+        return np.arange(size)
+
+    buckets = n // 2
+    bucket = np.arange(size) * buckets // size
+    # Sorted by bucket then value: each bucket's first entry is its min, last its max
+    order = np.lexsort((y, bucket))
+    starts = np.searchsorted(bucket[order], np.arange(buckets))
+    ends = np.append(starts[1:], size) - 1
+    return np.unique(np.concatenate([order[starts], order[ends]]))
+
+def indices(method, x, y, max_points):
+    """Indices of at most max_points points of the series to keep with `method`."""
+    if method == "lttb":
+        return lttb_indices(x, y, max_points)
+    if method == "minmax":
+        return minmax_indices(y, max_points)
+    raise ValueError(f"Unknown downsampling method: {method}")
@@ -0,0 +1,188 @@
+import functools
+import logging
+import multiprocessing
+import os
+import threading
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import nullcontext
+
+from . import metrics, profiling
+
+# Model inference in worker processes. Each worker loads the active models once (in the
+# pool initializer) and then serves calls to prediction.* functions: date ranges, with
+# or without a weather frame, go in pickled and the hourly result frames come back. The
+# API process never imports the models, so inference neither holds its GIL nor its
+# memory, and throughput scales with INFERENCE_WORKERS. INFERENCE_WORKERS=0 runs the
+# same calls in-process instead. Each result comes back with the metrics the worker
+# recorded for the call and, when the caller is being profiled, the worker's stacks.
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", "1"))
+
+_pool = None
+_pool_lock = threading.Lock()
+
+class RemoteTraceback(Exception):
+    """Traceback of an error raised in a worker, chained as the cause of the re-raised error."""
+
+    def __str__(self):
+        return self.args[0]
+
+def enabled():
+    return INFERENCE_WORKERS > 0
+
+def _registry_state():
+    """Active model names and all model specs of this process, sent with every call."""
+    from .registry import registry
+    return {kind: registry.active_name(kind) for kind in ("lstm", "lgbm")}, dict(registry.specs)
+
+def _sync_registry(state):
+    # Runs in the worker: follow registrations and promotions made in the API process
+    from .registry import registry
+    active, specs = state
+    for name, spec in specs.items():
+        if name not in registry.specs:
+            registry.register(name, spec)
+    for kind, name in active.items():
+        if registry.active_name(kind) != name:
+            # A worker runs one call at a time, so the version can load on first use
+            registry.promote(name, load=False)
+    for name in set(registry.specs) - set(specs):
+        registry.unregister(name)
+
+def _init_worker(state):
+    from .registry import registry
+    _sync_registry(state)
+    # A model that fails to load must not break the pool: the other kinds still serve,
+    # and the failing one is retried (and its error reported) on its first call
+    for name in state[0].values():
+        try:
+            registry.get(name)
+        except Exception as e:
+            logging.error(f"Inference worker {os.getpid()} could not load {name}: {e}")
+    logging.info(f"Inference worker {os.getpid()} ready")
+
+def _call(state, fn, args, kwargs, profile):
+    # Runs in the worker. Errors are returned rather than raised so that the metrics
+    # recorded before them still reach the API process.
+    _sync_registry(state)
+    result, error = None, None
+    with profiling.sampled() if profile else nullcontext() as sampled:
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            error = (e, traceback.format_exc())
+    return result, error, metrics.drain(), sampled.stacks if profile else None
+
+def _predict(fn_name, *args, **kwargs):
+    from . import prediction
+    return getattr(prediction, fn_name)(*args, **kwargs)
+
+def _load(name):
+    from .registry import registry
+    registry.get(name)
+    return registry.stats()["models"][name]
+
+def _stats():
+    from .registry import registry
+    return registry.stats()
+
+def _ping():
+    return os.getpid()
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: workers start from a clean interpreter rather than a fork of a threaded server
+            _pool = ProcessPoolExecutor(
+                max_workers=INFERENCE_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(_registry_state(),),
+            )
+        return _pool
+
+def _reset_pool(pool):
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def _submit(fn, *args, **kwargs):
+    """fn(*args, **kwargs) in a worker process; fn must be a module-level function."""
+    pool = _get_pool()
+    profile = profiling.active()
+    with metrics.timed("inference_call"), profiling.remote(profile) if profile else nullcontext() as add_stacks:
+        try:
+            result, error, samples, stacks = pool.submit(
+                _call, _registry_state(), fn, args, kwargs, profile is not None).result()
+        except BrokenProcessPool:
+            logging.error("Inference worker died; restarting the pool on the next call")
+            _reset_pool(pool)
+            raise
+        metrics.merge(samples)
+        if stacks:
+            add_stacks(stacks)
+        if error is not None:
+            raise error[0] from RemoteTraceback(error[1])
+        return result
+
+def run(fn_name, *args, **kwargs):
+    """Call prediction.<fn_name>(*args, **kwargs) in a worker process and return its result.
+
+    A pool whose worker died is discarded, so the next call starts a fresh one.
+    """
+    if not enabled():
+        return _predict(fn_name, *args, **kwargs)
+    return _submit(_predict, fn_name, *args, **kwargs)
+
+def load_model(name):
+    """Load model `name` where inference runs and return its registry stats from there.
+
+    With several workers only the one serving this call loads it now; the others load
+    it on first use.
+    """
+    if not enabled():
+        return _load(name)
+    return _submit(_load, name)
+
+def model_stats():
+    """registry.stats() of the process that runs inference (one worker when they are enabled)."""
+    if not enabled():
+        return _stats()
+    return _submit(_stats)
+
+def warm():
+    """Start the workers and wait until they have loaded the models.
+
+    A pool whose worker died is replaced and warmed once more before giving up.
+    """
+    for attempt in range(2):
+        pool = _get_pool()
+        try:
+            pids = {future.result() for future in [pool.submit(_ping) for _ in range(INFERENCE_WORKERS)]}
+        except BrokenProcessPool:
+            logging.error("Inference worker died while warming; restarting the pool")
+            _reset_pool(pool)
+            if attempt:
+                raise
+            continue
+        logging.info(f"{len(pids)} inference worker(s) ready")
+        return
+
+def shutdown():
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+class PredictionProxy:
+    """Stands in for the prediction module: prediction_proxy.fn(...) runs inference.run("fn", ...)."""
+
+    def __getattr__(self, fn_name):
+        return functools.partial(run, fn_name)
+
+prediction_proxy = PredictionProxy()
@@ -0,0 +1,168 @@
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from datetime import datetime
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from . import backfill, crud, inference, metrics, models, profiling
+from .database import SessionLocal
+
+# Manual prediction runs (/trigger-day). Jobs are rows of prediction_jobs, so queued work
+# survives a restart. Triggering a (model, date) that is already queued or running joins
+# that job instead of starting another. A fixed pool of PREDICTION_JOB_WORKERS threads,
+# separate from the threads serving requests, runs them oldest first and writes the
+# results through crud.write_hourly_frame, replacing the stored rows for that day.
+PREDICTION_JOB_WORKERS = int(os.getenv("PREDICTION_JOB_WORKERS", "2"))
+JOB_MODEL_WAIT_SECONDS = float(os.getenv("JOB_MODEL_WAIT_SECONDS", "300"))
+JOB_MODELS = ("lstm", "lgbm")
+PENDING_STATES = ("queued", "running")
+
+_executor = None
+_executor_lock = threading.Lock()
+_enqueue_lock = threading.Lock()
+_claim_lock = threading.Lock()
+_profiled = set()  # Ids of jobs whose trigger asked for a profile
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=PREDICTION_JOB_WORKERS, thread_name_prefix="prediction-job")
+        return _executor
+
+def job_dict(job):
+    return {
+        "id": job.id,
+        "model": job.model,
+        "date": job.date.isoformat(),
+        "state": job.state,
+        "requests": job.requests,
+        "rows": job.rows,
+        "error": job.error,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+    }
+
+def enqueue(db: Session, model, day, profile=False):
+    """Queue a prediction of `model` for `day`, or join the pending job for it.
+
+    Returns (job dict, created). Only a newly created job is handed to the pool.
+    """
+    if model not in JOB_MODELS:
+        raise ValueError(f"model must be one of {', '.join(JOB_MODELS)}")
+    with _enqueue_lock:
+        job = db.query(models.PredictionJob).filter(
+            models.PredictionJob.model == model,
+            models.PredictionJob.date == day,
+            models.PredictionJob.state.in_(PENDING_STATES),
+        ).first()
+        created = job is None
+        if created:
+            job = models.PredictionJob(model=model, date=day, state="queued", requests=1, created_at=datetime.now())
+            db.add(job)
+        else:
+            job.requests += 1
+        if created and profile:
+            # Flag the job before the commit makes it claimable by a running worker
+            db.flush()
+            _profiled.add(job.id)
+        try:
+            db.commit()
+        except Exception:
+            if created and profile:
+                _profiled.discard(job.id)
+            raise
+        result = job_dict(job)
+    if created:
+        _get_executor().submit(_run_next)
+        logging.info(f"Queued prediction job {job.id}: {model} {day}")
+    return result, created
+
+def _claim(db: Session):
+    """Mark the oldest queued job running and return it, or None if there is none."""
+    with _claim_lock:
+        job = db.query(models.PredictionJob).filter(
+            models.PredictionJob.state == "queued"
+        ).order_by(models.PredictionJob.id).first()
+        if job is None:
+            return None
+        job.state = "running"
+        job.started_at = datetime.now()
+        db.commit()
+        return job
+
+def _predict(model, day):
+    # The models are loaded once at startup; a job that runs before then waits for them
+    if not backfill.models_loaded[model].wait(JOB_MODEL_WAIT_SECONDS):
+        raise RuntimeError(f"{model} model is not loaded: {backfill.models_error.get(model, 'still loading')}")
+    date_str = day.strftime("%Y-%m-%d")
+    if model == "lstm":
+        return inference.run("predict_lstm_for_day", date_str)
+    return inference.run("predict_lgbm_for_day", date_str)
+
+def _run_next():
+    db = SessionLocal()
+    try:
+        job = _claim(db)
+        if job is None:
+            return
+        label = f"{job.model} {job.date}"
+        try:
+            with profiling.capture(f"prediction job {label}") if job.id in _profiled else nullcontext():
+                results = _predict(job.model, job.date)
+            if results is None or len(results) == 0:
+                raise ValueError("prediction returned no rows")
+            # Rows and the job's completion commit together
+            with metrics.timed("db_write", rows=len(results)):
+                crud.write_hourly_frame(db, crud.BACKFILL_TABLES[job.model], results, replace=True)
+                job.state = "done"
+                job.rows = len(results)
+                job.finished_at = datetime.now()
+                db.commit()
+            logging.info(f"Prediction job {job.id} ({label}) wrote {job.rows} rows")
+        except Exception as e:
+            logging.error(f"Prediction job {job.id} ({label}) failed: {e}")
+            db.rollback()
+            job.state = "failed"
+            job.error = str(e)
+            job.finished_at = datetime.now()
+            db.commit()
+        finally:
+            _profiled.discard(job.id)
+    except Exception:
+        logging.exception("Prediction job runner failed")
+    finally:
+        db.close()
+
+def start():
+    """Requeue jobs a previous process left running and schedule all queued jobs."""
+    db = SessionLocal()
+    try:
+        interrupted = db.query(models.PredictionJob).filter(
+            models.PredictionJob.state == "running"
+        ).update({"state": "queued", "started_at": None})
+        db.commit()
+        queued = db.query(func.count(models.PredictionJob.id)).filter(
+            models.PredictionJob.state == "queued"
+        ).scalar()
+    finally:
+        db.close()
+    if interrupted:
+        logging.info(f"Requeued {interrupted} interrupted prediction jobs")
+    for _ in range(queued):
+        _get_executor().submit(_run_next)
+
+def get_job(db: Session, job_id):
+    job = db.get(models.PredictionJob, job_id)
+    return job_dict(job) if job is not None else None
+
+def list_jobs(db: Session, state=None, limit=50):
+    """Most recent jobs first, optionally only those in `state`."""
+    query = db.query(models.PredictionJob)
+    if state:
+        query = query.filter(models.PredictionJob.state == state)
+    return [job_dict(job) for job in query.order_by(models.PredictionJob.id.desc()).limit(limit)]
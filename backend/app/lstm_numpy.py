@@ -0,0 +1,172 @@
+import io
+import json
+import re
+import zipfile
+import h5py
+import numpy as np
+
+# Inference for the saved Keras LSTM models without TensorFlow. The Sequential stack
+# (LSTM / Dropout / Dense) is rebuilt from the saved config and evaluated in NumPy,
+# batched over sequences. TensorFlow is only needed to train or re-export models.
+
+ACTIVATIONS = {
+    "tanh": np.tanh,
+    # tanh form of the logistic function: same values, no overflow for large |x|
+    "sigmoid": lambda x: 0.5 * (1.0 + np.tanh(0.5 * x)),
+    "relu": lambda x: np.maximum(x, 0),
+    "linear": lambda x: x,
+}
+
+def _activation(name):
+    if name not in ACTIVATIONS:
+        raise ValueError(f"Unsupported activation: {name}")
+    return ACTIVATIONS[name]
+
+class LSTMLayer:
+    """Keras LSTM layer (gate order i, f, c, o) evaluated over a batch of sequences."""
+
+    def __init__(self, config, kernel, recurrent_kernel, bias):
+        if config.get("go_backwards") or config.get("stateful"):
+            raise ValueError(f"Unsupported LSTM options in layer {config.get('name')}")
+        self.units = config["units"]
+        self.return_sequences = config.get("return_sequences", False)
+        self.activation = _activation(config.get("activation", "tanh"))
+        self.recurrent_activation = _activation(config.get("recurrent_activation", "sigmoid"))
+        self.kernel = np.asarray(kernel, dtype=np.float32)
+        self.recurrent_kernel = np.asarray(recurrent_kernel, dtype=np.float32)
+        self.bias = np.asarray(bias, dtype=np.float32) if bias is not None else np.zeros(4 * self.units, np.float32)
+
+    def __call__(self, x):
+        batch, steps, _ = x.shape
+        units = self.units
+        # Input projections for every timestep in one matmul; only h @ U stays in the loop
+        x_proj = x @ self.kernel + self.bias
+        h = np.zeros((batch, units), dtype=np.float32)
+        c = np.zeros((batch, units), dtype=np.float32)
+        outputs = np.empty((batch, steps, units), dtype=np.float32) if self.return_sequences else None
+
+        for t in range(steps):
+            z = x_proj[:, t] + h @ self.recurrent_kernel
+            i = self.recurrent_activation(z[:, :units])
+            f = self.recurrent_activation(z[:, units:2 * units])
+            g = self.activation(z[:, 2 * units:3 * units])
+            o = self.recurrent_activation(z[:, 3 * units:])
+            c = f * c + i * g
+            h = o * self.activation(c)
+            if outputs is not None:
+                outputs[:, t] = h
+        return outputs if outputs is not None else h
+
+class DenseLayer:
+    def __init__(self, config, kernel, bias):
+        self.activation = _activation(config.get("activation", "linear"))
+        self.kernel = np.asarray(kernel, dtype=np.float32)
+        self.bias = np.asarray(bias, dtype=np.float32) if bias is not None else 0
+
+    def __call__(self, x):
+        return self.activation(x @ self.kernel + self.bias)
+
+class NumpySequentialModel:
+    """A Keras Sequential model of LSTM/Dense/Dropout layers, evaluated in NumPy."""
+
+    def __init__(self, layers, input_shape=None):
+        self.layers = layers
+        self.input_shape = input_shape
+
+    def predict(self, x, verbose=0, batch_size=None):
+        """Same call shape as keras Model.predict: (batch, steps, features) -> (batch, outputs)."""
+        out = np.asarray(x, dtype=np.float32)
+        for layer in self.layers:
+            out = layer(out)
+        return out
+
+    @property
+    def nbytes(self):
+        total = 0
+        for layer in self.layers:
+            for value in vars(layer).values():
+                if isinstance(value, np.ndarray):
+                    total += value.nbytes
+        return total
+
+def _build(config, layer_weights):
+    """Build the layer stack from a Sequential config and a {layer_name: [arrays]} lookup."""
+    if config.get("class_name") != "Sequential":
+        raise ValueError(f"Only Sequential models are supported, got {config.get('class_name')}")
+
+    layers = []
+    input_shape = None
+    for layer in config["config"]["layers"]:
+        kind = layer["class_name"]
+        cfg = layer["config"]
+        if kind == "InputLayer":
+            input_shape = cfg.get("batch_shape") or cfg.get("batch_input_shape")
+        elif kind == "Dropout":
+            continue  # identity at inference
+        elif kind == "LSTM":
+            kernel, recurrent_kernel, *bias = layer_weights(cfg["name"], 3 if cfg.get("use_bias", True) else 2)
+            layers.append(LSTMLayer(cfg, kernel, recurrent_kernel, bias[0] if bias else None))
+        elif kind == "Dense":
+            kernel, *bias = layer_weights(cfg["name"], 2 if cfg.get("use_bias", True) else 1)
+            layers.append(DenseLayer(cfg, kernel, bias[0] if bias else None))
+        else:
+            raise ValueError(f"Unsupported layer type: {kind}")
+    return NumpySequentialModel(layers, input_shape)
+
+def _load_h5(path):
+    """Legacy Keras HDF5 file: config in attrs, weights under model_weights/<layer>/<weight_names>."""
+    with h5py.File(path, "r") as f:
+        config = json.loads(f.attrs["model_config"])
+        group = f["model_weights"] if "model_weights" in f else f
+
+        def layer_weights(name, expected):
+            layer_group = group[name]
+            names = [n.decode() if isinstance(n, bytes) else n for n in layer_group.attrs["weight_names"]]
+            arrays = [layer_group[n][()] for n in names]
+            if len(arrays) != expected:
+                raise ValueError(f"Layer {name}: expected {expected} weights, found {len(arrays)}")
+            return arrays
+
+        return _build(config, layer_weights)
+
+def _snake_case(name):
+    # Same rule as keras' to_snake_case: LSTM -> lstm, BatchNormalization -> batch_normalization
+    name = re.sub(r"(.)([A-Z][a-z]+)", r"\1_\2", name)
+    return re.sub(r"([a-z])([A-Z])", r"\1_\2", name).lower()
+
+def _load_keras(path):
+    """Keras 3 .keras archive: config.json plus model.weights.h5 with layers/<name>[/cell]/vars/<i>."""
+    with zipfile.ZipFile(path) as archive:
+        config = json.loads(archive.read("config.json"))
+        weights_file = io.BytesIO(archive.read("model.weights.h5"))
+
+    # Weights are stored under the layer's class-based path (lstm, lstm_1, dense, ...) in
+    # model order, not under the layer name from the config
+    paths = {}
+    counts = {}
+    for layer in config["config"]["layers"]:
+        if layer["class_name"] == "InputLayer":
+            continue
+        base = _snake_case(layer["class_name"])
+        n = counts.get(base, 0)
+        counts[base] = n + 1
+        paths[layer["config"]["name"]] = base if n == 0 else f"{base}_{n}"
+
+    with h5py.File(weights_file, "r") as f:
+        def layer_weights(name, expected):
+            layer_group = f["layers"][paths[name]]
+            vars_group = layer_group["cell"]["vars"] if "cell" in layer_group else layer_group["vars"]
+            arrays = [vars_group[str(i)][()] for i in range(len(vars_group))]
+            if len(arrays) != expected:
+                raise ValueError(f"Layer {name}: expected {expected} weights, found {len(arrays)}")
+            return arrays
+
+        return _build(config, layer_weights)
+
+def load_model(path):
+    """Load a saved .h5 or .keras LSTM model for NumPy inference."""
+    if path.endswith(".keras"):
+        return _load_keras(path)
+    if path.endswith((".h5", ".hdf5")):
+        return _load_h5(path)
+    raise ValueError(f"Unsupported model file: {path}")
@@ -1,15 +1,15 @@
-from fastapi import FastAPI, BackgroundTasks, Depends
+from concurrent.futures.process import BrokenProcessPool
+from fastapi import FastAPI, BackgroundTasks, Body, Depends, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
 import logging
+import time
+import numpy as np
 
-from . import models, prediction, database
+from . import models, database, crud, weather, backfill, metrics, profiling, downsample, response_cache, jobs, inference
 from .database import SessionLocal, engine
 
-# Initialize Database
-PROJECT_START_DATE = datetime(2026, 1, 1)
-
 def setup_db():
     from sqlalchemy import inspect
     inspector = inspect(engine)
@@ -21,10 +21,20 @@ def setup_db():
     
     models.init_db()
 
-setup_db()
+    db = SessionLocal()
+    try:
+        if crud.ensure_daily_energy(db):
+            logging.info("Built daily_energy rollup from existing hourly tables")
+    finally:
+        db.close()
 
 app = FastAPI(title="Solar Power Prediction API")
 
+if profiling.PROFILING_ENABLED:
+    # Must be set before the routes below are declared
+    app.router.route_class = profiling.ProfiledRoute
+    app.middleware("http")(profiling.profile_request_middleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -33,6 +43,20 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Route template (e.g. /models/{name}/load) rather than the raw path keeps label cardinality bounded
+        route = request.scope.get("route")
+        metrics.http_seconds.observe(
+            time.perf_counter() - started, request.method, route.path if route else "unmatched", status)
+
 def get_db():
     db = SessionLocal()
     try:
@@ -40,162 +64,64 @@ def get_db():
     finally:
         db.close()
 
-def backfill_data(db: Session):
-    """Populate database for both LSTM and LGBM from PROJECT_START_DATE to Tomorrow."""
-    start_date = PROJECT_START_DATE
-    end_date = datetime.now() + timedelta(days=1)
-    
-    current_date = start_date
-    while current_date <= end_date:
-        date_str = current_date.strftime("%Y-%m-%d")
-        day_start = datetime.combine(current_date.date(), datetime.min.time())
-        day_end = day_start + timedelta(days=1)
-        # Actual Data Backfill (Up to Yesterday)
-        if current_date.date() < datetime.now().date():
-            exists_actual = db.query(models.ActualData).filter(
-                models.ActualData.timestamp >= day_start,
-                models.ActualData.timestamp < day_end
-            ).first()
-            if not exists_actual:
-                try:
-                    results = prediction.fetch_actual_data_for_day(date_str)
-                    for _, row in results.iterrows():
-                        db.add(models.ActualData(
-                            timestamp=row['timestamp'].to_pydatetime(),
-                            temperature=row['temperature'],
-                            humidity=row['humidity'],
-                            wind_speed=row['wind_speed'],
-                            wind_direction=row['wind_direction'],
-                            surface_pressure=row['surface_pressure'],
-                            cloud_cover=row['cloud_cover'],
-                            water_vapour=row['water_vapour'],
-                            dni=row['dni'],
-                            dhi=row['dhi'],
-                            ghi=row['ghi'],
-                            power=row['power'],
-                            kt=row['kt'],
-                            solar_zenith=row['solar_zenith'],
-                            cos_zenith=row['cos_zenith'],
-                            clear_ghi=row['clear_ghi'],
-                            ghi_clear_weighted=row['ghi_clear_weighted'],
-                            hour_sin=row['hour_sin'],
-                            hour_cos=row['hour_cos'],
-                            day_sin=row['day_sin'],
-                            day_cos=row['day_cos']
-                        ))
-                    db.commit()
-                except Exception as e:
-                    logging.error(f"Actual Error {date_str}: {e}")
-                    db.rollback()
-
-        # LSTM Backfill
-        exists_lstm = db.query(models.LSTMPrediction).filter(
-            models.LSTMPrediction.timestamp >= day_start,
-            models.LSTMPrediction.timestamp < day_end
-        ).first()
-        if not exists_lstm:
-            try:
-                results = prediction.predict_lstm_for_day(date_str)
-                for _, row in results.iterrows():
-                    db.add(models.LSTMPrediction(
-                        timestamp=row['timestamp'].to_pydatetime(),
-                        temperature=row['temperature'],
-                        humidity=row['humidity'],
-                        wind_speed=row['wind_speed'],
-                        wind_direction=row['wind_direction'],
-                        surface_pressure=row['surface_pressure'],
-                        cloud_cover=row['cloud_cover'],
-                        water_vapour=row['water_vapour'],
-                        dni=row['dni'],
-                        dhi=row['dhi'],
-                        ghi=row['ghi_pred'],
-                        power=row['power'],
-                        kt=row['kt'],
-                        solar_zenith=row['solar_zenith'],
-                        cos_zenith=row['cos_zenith'],
-                        clear_ghi=row['clear_ghi'],
-                        ghi_clear_weighted=row['ghi_clear_weighted'],
-                        hour_sin=row['hour_sin'],
-                        hour_cos=row['hour_cos'],
-                        day_sin=row['day_sin'],
-                        day_cos=row['day_cos']
-                    ))
-                db.commit()
-            except Exception as e:
-                logging.error(f"LSTM Error {date_str}: {e}")
-                db.rollback()
-
-        # LGBM Backfill
-        exists_lgbm = db.query(models.LGBMPrediction).filter(
-            models.LGBMPrediction.timestamp >= day_start,
-            models.LGBMPrediction.timestamp < day_end
-        ).first()
-        if not exists_lgbm:
-            try:
-                results = prediction.predict_lgbm_for_day(date_str)
-                for _, row in results.iterrows():
-                    db.add(models.LGBMPrediction(
-                        timestamp=row['timestamp'].to_pydatetime(),
-                        temperature=row['temperature'],
-                        humidity=row['humidity'],
-                        wind_speed=row['wind_speed'],
-                        wind_direction=row['wind_direction'],
-                        surface_pressure=row['surface_pressure'],
-                        cloud_cover=row['cloud_cover'],
-                        water_vapour=row['water_vapour'],
-                        dni=row['dni'],
-                        dhi=row['dhi'],
-                        ghi=row['ghi_pred'],
-                        power=row['power'],
-                        kt=row['kt'],
-                        solar_zenith=row['solar_zenith'],
-                        cos_zenith=row['cos_zenith'],
-                        clear_ghi=row['clear_ghi'],
-                        ghi_clear_weighted=row['ghi_clear_weighted'],
-                        hour_sin=row['hour_sin'],
-                        hour_cos=row['hour_cos'],
-                        day_sin=row['day_sin'],
-                        day_cos=row['day_cos']
-                    ))
-                db.commit()
-            except Exception as e:
-                logging.error(f"LGBM Error {date_str}: {e}")
-                db.rollback()
-        
-        current_date += timedelta(days=1)
-
 @app.on_event("startup")
 def startup_event():
-    db = SessionLocal()
-    try:
-        backfill_data(db)
-    finally:
-        db.close()
+    # Only the schema check runs before the server binds; models and backfill load in the background
+    setup_db()
+    backfill.start_background_backfill()
+    weather.current_weather.start()
+    jobs.start()
 
-from sqlalchemy import func
+@app.on_event("shutdown")
+def shutdown_event():
+    inference.shutdown()
 
 @app.get("/current-weather")
-def get_current_weather():
-    """Fetch truly live weather data for the current hour."""
-    now = datetime.now()
-    date_str = now.strftime("%Y-%m-%d")
-    try:
-        df = prediction.fetch_weather_data(prediction.LAT, prediction.LON, date_str, date_str, use_archive=False)
-        current_hour = now.hour
-        row = df.iloc[current_hour]
-        return {
-            "temperature": float(row["temperature"]),
-            "humidity": float(row["humidity"]),
-            "wind_speed": float(row["wind_speed"]),
-            "timestamp": row["timestamp"].isoformat()
-        }
-    except Exception as e:
-        logging.error(f"Error fetching current weather: {e}")
-        return {"error": str(e)}
+def get_current_weather(refresh: bool = False):
+    """Live conditions for the current hour from the background-refreshed snapshot.
+
+    Includes the snapshot's age_seconds and a stale flag, set when the last refresh
+    failed or the data is old. refresh=true asks for a fetch in the background.
+    """
+    snapshot = weather.current_weather.read()
+    if snapshot is None:
+        # Nothing fetched yet (e.g. just after startup): fetch in this request once
+        weather.current_weather.refresh()
+        snapshot = weather.current_weather.read()
+        if snapshot is None:
+            raise HTTPException(status_code=503, detail=f"Live weather unavailable: {weather.current_weather.error}")
+    elif refresh:
+        weather.current_weather.request_refresh()
+    return snapshot
 
 @app.get("/predictions")
-def get_predictions(view_mode: str = "forecast", range_days: int = 1, date: str = None, db: Session = Depends(get_db)):
-    """Fetch analytics data for Forecast (Tomorrow ONLY) or Past (Yesterday/Custom history)."""
+def get_predictions(request: Request, view_mode: str = "forecast", range_days: int = 1, date: str = None,
+                    format: str = "rows", fields: str = None, max_points: int = None,
+                    downsample_method: str = "lttb", db: Session = Depends(get_db)):
+    """Fetch analytics data for Forecast (Tomorrow ONLY) or Past (Yesterday/Custom history).
+
+    format=columnar returns one shared timestamp array and, per model, an array for each
+    of `fields` (comma-separated, default ghi,power) aligned to it, null where a model
+    has no row for that hour.
+
+    max_points caps the points returned per model series: LTTB (or min/max per bucket
+    with downsample_method=minmax) picks which hours to keep, judged on power. Summaries
+    are always computed from every hour in the range.
+
+    Responses are cached until the next write of hourly rows and carry an ETag.
+    """
+    if format not in ("rows", "columnar"):
+        raise HTTPException(status_code=400, detail="format must be 'rows' or 'columnar'")
+    if format == "columnar":
+        field_list = [f.strip() for f in fields.split(",") if f.strip()] if fields else ["ghi", "power"]
+        unknown = [f for f in field_list if f not in crud.PROJECTABLE_COLUMNS]
+        if unknown or not field_list:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}" if unknown else "No fields requested")
+    if max_points is not None and max_points < 3:
+        raise HTTPException(status_code=400, detail="max_points must be at least 3")
+    if downsample_method not in downsample.METHODS:
+        raise HTTPException(status_code=400, detail=f"downsample_method must be one of {', '.join(downsample.METHODS)}")
+
     today = datetime.now().date()
     yesterday = today - timedelta(days=1)
     tomorrow = today + timedelta(days=1)
@@ -217,29 +143,7 @@ def get_predictions(view_mode: str = "forecast", range_days: int = 1, date: str
         end_dt = datetime.combine(base_date, datetime.max.time())
         summary_date = base_date
 
-    # Data Queries
-    lstm_data = db.query(models.LSTMPrediction).filter(
-        models.LSTMPrediction.timestamp >= start_dt,
-        models.LSTMPrediction.timestamp <= end_dt
-    ).order_by(models.LSTMPrediction.timestamp.asc()).all()
-
-    lgbm_data = db.query(models.LGBMPrediction).filter(
-        models.LGBMPrediction.timestamp >= start_dt,
-        models.LGBMPrediction.timestamp <= end_dt
-    ).order_by(models.LGBMPrediction.timestamp.asc()).all()
-
-    actual_data = db.query(models.ActualData).filter(
-        models.ActualData.timestamp >= start_dt,
-        models.ActualData.timestamp <= end_dt
-    ).order_by(models.ActualData.timestamp.asc()).all()
-
-    # Summaries for the primary cards
-    def get_summary(data_list, view_m, range_d):
-        if view_m == "past" and range_d > 1:
-            return sum([p.power for p in data_list])
-        return sum([p.power for p in data_list if p.timestamp.date() == summary_date])
-
-    return {
+    header = {
         "view_mode": view_mode,
         "range_days": range_days,
         "is_today": view_mode == "forecast",
@@ -247,55 +151,291 @@ def get_predictions(view_mode: str = "forecast", range_days: int = 1, date: str
         "tomorrow_date": tomorrow.strftime("%b %d, %Y"),
         "target_date_label": summary_date.strftime("%b %d, %Y"),
         "target_date_iso": summary_date.isoformat(),
-        "lstm": {
-            "data": lstm_data,
-            "summary_mwh": get_summary(lstm_data, view_mode, range_days)
-        },
-        "lgbm": {
-            "data": lgbm_data,
-            "summary_mwh": get_summary(lgbm_data, view_mode, range_days)
-        },
-        "actual": {
-            "data": actual_data,
-            "summary_mwh": get_summary(actual_data, view_mode, range_days)
+    }
+    key = (today, view_mode, range_days, start_dt, end_dt, format,
+           tuple(field_list) if format == "columnar" else None, max_points, downsample_method)
+
+    def build():
+        if format == "columnar":
+            return {**header, **_columnar_predictions(db, start_dt, end_dt, field_list, max_points, downsample_method)}
+
+        # Data Queries
+        lstm_data = db.query(models.LSTMPrediction).filter(
+            models.LSTMPrediction.timestamp >= start_dt,
+            models.LSTMPrediction.timestamp <= end_dt
+        ).order_by(models.LSTMPrediction.timestamp.asc()).all()
+
+        lgbm_data = db.query(models.LGBMPrediction).filter(
+            models.LGBMPrediction.timestamp >= start_dt,
+            models.LGBMPrediction.timestamp <= end_dt
+        ).order_by(models.LGBMPrediction.timestamp.asc()).all()
+
+        actual_data = db.query(models.ActualData).filter(
+            models.ActualData.timestamp >= start_dt,
+            models.ActualData.timestamp <= end_dt
+        ).order_by(models.ActualData.timestamp.asc()).all()
+
+        # Summaries for the primary cards
+        def get_summary(data_list, view_m, range_d):
+            if view_m == "past" and range_d > 1:
+                return sum([p.power for p in data_list])
+            return sum([p.power for p in data_list if p.timestamp.date() == summary_date])
+
+        def get_data(data_list):
+            if max_points is None:
+                return data_list
+            x = np.array([p.timestamp for p in data_list], dtype="datetime64[s]").astype(np.int64)
+            y = [p.power for p in data_list]
+            return [data_list[i] for i in downsample.indices(downsample_method, x, y, max_points)]
+
+        return {
+            **header,
+            "lstm": {
+                "data": get_data(lstm_data),
+                "summary_mwh": get_summary(lstm_data, view_mode, range_days)
+            },
+            "lgbm": {
+                "data": get_data(lgbm_data),
+                "summary_mwh": get_summary(lgbm_data, view_mode, range_days)
+            },
+            "actual": {
+                "data": get_data(actual_data),
+                "summary_mwh": get_summary(actual_data, view_mode, range_days)
+            }
         }
+
+    return response_cache.respond(request, "predictions", key, build)
+
+def _downsample_columns(ts, columns, method, max_points):
+    """Keep at most max_points hours of one table's columns, judged on power (else the first field)."""
+    if max_points is None or len(ts) <= max_points:
+        return ts, columns
+    x = np.array(ts, dtype="datetime64[s]").astype(np.int64)
+    y = columns["power"] if "power" in columns else next(iter(columns.values()))
+    keep = downsample.indices(method, x, y, max_points)
+    return [ts[i] for i in keep], {field: [values[i] for i in keep] for field, values in columns.items()}
+
+def _columnar_predictions(db: Session, start_dt, end_dt, fields, max_points=None, method="lttb"):
+    """Projected columns of the three hourly tables on their union of timestamps.
+
+    With max_points each table is downsampled on its own before alignment, so a model
+    has values only at the hours kept for it.
+    """
+    tables = {
+        name: _downsample_columns(*crud.hourly_columns(db, model, start_dt, end_dt, fields), method, max_points)
+        for name, model in crud.BACKFILL_TABLES.items()
     }
+    timestamps = sorted(set().union(*(ts for ts, _ in tables.values())))
+    # Summaries cover the whole window, as in the row format (a single day unless range_days > 1)
+    totals = crud.energy_totals(db, start_dt.date(), end_dt.date())
+
+    result = {"format": "columnar", "fields": fields, "timestamp": timestamps}
+    position = {ts: i for i, ts in enumerate(timestamps)}
+    for name, (ts, columns) in tables.items():
+        if ts == timestamps:
+            series = columns
+        else:
+            index = [position[t] for t in ts]
+            series = {}
+            for field, values in columns.items():
+                aligned = [None] * len(timestamps)
+                for i, value in zip(index, values):
+                    aligned[i] = value
+                series[field] = aligned
+        result[name] = {**series, "summary_mwh": totals[name]}
+    return result
 
 @app.post("/trigger-day")
-def trigger_day(date: str, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
-    """Manually trigger prediction for both models."""
-    background_tasks.add_task(prediction.predict_lstm_for_day, date)
-    background_tasks.add_task(prediction.predict_lgbm_for_day, date)
-    return {"message": f"Prediction tasks for {date} added to background for both models"}
+def trigger_day(date: str, db: Session = Depends(get_db)):
+    """Queue prediction jobs for both models; a day already queued or running is joined, not re-run."""
+    try:
+        day = datetime.strptime(date, "%Y-%m-%d").date()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="date must be YYYY-MM-DD")
+    queued = [jobs.enqueue(db, model, day, profile=profiling.requested()) for model in jobs.JOB_MODELS]
+    new = sum(created for _, created in queued)
+    return {
+        "message": f"Prediction jobs for {date}: {new} queued, {len(queued) - new} already pending",
+        "jobs": [job for job, _ in queued],
+    }
+
+@app.get("/jobs")
+def list_prediction_jobs(state: str = None, limit: int = 50, db: Session = Depends(get_db)):
+    """Recent prediction jobs, newest first."""
+    return jobs.list_jobs(db, state=state, limit=min(max(limit, 1), 500))
+
+@app.get("/jobs/{job_id}")
+def get_prediction_job(job_id: int, db: Session = Depends(get_db)):
+    job = jobs.get_job(db, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    return job
 
 @app.get("/status")
 def get_status():
-    return {"status": "running", "time": datetime.now()}
+    """Liveness plus weather frame cache statistics (lookups include the inference workers')."""
+    return {"status": "running", "time": datetime.now(), "weather_cache": weather.frame_cache.stats()}
+
+@app.get("/metrics")
+def get_metrics():
+    """Stage latencies, throughput, request latencies and cache hit ratios in Prometheus text format."""
+    return Response(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/admin/profiles")
+def list_profiles():
+    """Recent captured profiles (most recent first). Enable with PROFILING_ENABLED=1."""
+    return {"enabled": profiling.PROFILING_ENABLED, "profiles": profiling.list_profiles()}
+
+@app.get("/admin/profiles/{profile_id}")
+def get_profile(profile_id: str):
+    """A captured profile as collapsed stacks, for flamegraph.pl or speedscope."""
+    profile = profiling.get_profile(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail=f"Unknown profile: {profile_id}")
+    return Response(
+        profile.folded(),
+        media_type="text/plain",
+        headers={"Content-Disposition": f'attachment; filename="profile-{profile.id}.folded"'},
+    )
+
+@app.get("/ready")
+def get_ready(response: Response):
+    """Readiness probe: 200 once a prediction model kind is loaded, 503 until then.
+
+    "models" says which kinds are loaded and "errors" why the others are not; those are
+    retried in the background.
+    """
+    loaded = {kind: event.is_set() for kind, event in backfill.models_loaded.items()}
+    if not any(loaded.values()):
+        response.status_code = 503
+    return {"ready": any(loaded.values()), "models": loaded, "errors": dict(backfill.models_error)}
+
+def _workers_restarting():
+    # A worker died during the call; the pool is replaced on the next one
+    return HTTPException(status_code=503, detail="Inference workers restarting, retry shortly")
+
+@app.get("/models")
+def get_models():
+    """Known models, whether they are loaded, and per-artifact load time and memory."""
+    try:
+        return inference.model_stats()
+    except BrokenProcessPool:
+        raise _workers_restarting()
+
+@app.post("/models/{name}/load")
+def load_model_version(name: str, spec: dict = Body(None)):
+    """Load a model version into memory. An optional spec registers a new version from files in models/.
+
+    The model is loaded where inference runs: in an inference worker when they are enabled.
+    A new version whose files fail to load is not kept registered.
+    """
+    from .registry import registry
+    if spec is not None:
+        try:
+            registry.register(name, spec)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    elif name not in registry.specs:
+        raise HTTPException(status_code=404, detail=f"Unknown model: {name}")
+    try:
+        stats = inference.load_model(name)
+    except Exception as e:
+        if spec is not None:
+            # Workers drop it too on their next call, keeping both registries in sync
+            registry.unregister(name)
+        if isinstance(e, BrokenProcessPool):
+            raise _workers_restarting()
+        logging.error(f"Loading model {name} failed: {e}")
+        raise HTTPException(status_code=400, detail=f"Could not load {name}: {e}")
+    # A kind that failed at startup may load now (e.g. its artifact was replaced)
+    backfill.retry_models()
+    return stats
+
+@app.post("/models/{name}/promote")
+def promote_model_version(name: str, background_tasks: BackgroundTasks, refresh: bool = True):
+    """Atomically make `name` the serving version of its kind.
+
+    With refresh, today's and tomorrow's stored LSTM forecasts are re-scored by the new
+    version in the background, so /predictions reflects it without a restart.
+    """
+    from .registry import registry
+    if name not in registry.specs:
+        raise HTTPException(status_code=404, detail=f"Unknown model: {name}")
+    try:
+        # With workers, load it in one first so a broken version fails here, before the swap
+        if inference.enabled():
+            inference.load_model(name)
+        previous = registry.promote(name, load=not inference.enabled())
+    except BrokenProcessPool:
+        raise _workers_restarting()
+    except Exception as e:
+        logging.error(f"Promoting model {name} failed: {e}")
+        raise HTTPException(status_code=400, detail=f"Could not load {name}: {e}")
+    backfill.retry_models()
+    if refresh and registry.specs[name]["kind"] == "lstm":
+        background_tasks.add_task(backfill.refresh_lstm_forecasts)
+    return {"active": registry.active_name(registry.specs[name]["kind"]), "previous": previous}
+
+@app.get("/models/compare")
+def compare_model_versions(start: str, end: str = None, versions: str = None):
+    """Score a date range with several LSTM versions side by side (comma-separated names)."""
+    from .registry import registry
+    end = end or start
+    names = versions.split(",") if versions else [n for n, spec in registry.specs.items() if spec["kind"] == "lstm"]
+    try:
+        result = inference.run("compare_lstm_versions", start, end, names)
+    except BrokenProcessPool:
+        raise _workers_restarting()
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    daily = result.groupby(result["timestamp"].dt.date).sum(numeric_only=True)
+    return {
+        "start": start,
+        "end": end,
+        "active": registry.active_name("lstm"),
+        "timestamps": [ts.isoformat() for ts in result["timestamp"]],
+        "versions": {
+            name: {
+                "ghi_pred": result[f"ghi_pred_{name}"].round(3).tolist(),
+                "power": result[f"power_{name}"].round(6).tolist(),
+                "daily_mwh": {str(day): float(mwh) for day, mwh in daily[f"power_{name}"].items()},
+            }
+            for name in names
+        },
+    }
+
+@app.get("/backfill/status")
+def get_backfill_status():
+    """Progress of the background backfill started at startup."""
+    return backfill.progress.snapshot()
+
+@app.get("/analytics/errors")
+def get_error_analytics(request: Request, start: str = None, end: str = None, daytime_only: bool = True, db: Session = Depends(get_db)):
+    """Hourly MAE, RMSE, nMBE, skill vs clear-sky persistence and hour/month error profiles per model."""
+    from . import analytics
+    try:
+        start_date = datetime.strptime(start, "%Y-%m-%d").date() if start else backfill.PROJECT_START_DATE.date()
+        end_date = datetime.strptime(end, "%Y-%m-%d").date() if end else datetime.now().date() - timedelta(days=1)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Dates must be YYYY-MM-DD")
+    return response_cache.respond(
+        request, "errors", (start_date, end_date, daytime_only),
+        lambda: analytics.hourly_error_report(db, start_date, end_date, daytime_only=daytime_only))
 
 @app.get("/analytics/model-performance")
-def get_model_performance(db: Session = Depends(get_db)):
+def get_model_performance(request: Request, db: Session = Depends(get_db)):
     """Fetch aggregated performance metrics for all models since project start."""
-    
-    # Query daily sums for all models
-    daily_actual = db.query(
-        func.date(models.ActualData.timestamp).label("date"),
-        func.sum(models.ActualData.power).label("total_power")
-    ).group_by(func.date(models.ActualData.timestamp)).all()
-    
-    daily_lstm = db.query(
-        func.date(models.LSTMPrediction.timestamp).label("date"),
-        func.sum(models.LSTMPrediction.power).label("total_power")
-    ).group_by(func.date(models.LSTMPrediction.timestamp)).all()
-    
-    daily_lgbm = db.query(
-        func.date(models.LGBMPrediction.timestamp).label("date"),
-        func.sum(models.LGBMPrediction.power).label("total_power")
-    ).group_by(func.date(models.LGBMPrediction.timestamp)).all()
-
-    # Convert to maps for easy lookup
-    actual_map = {str(d.date): float(d.total_power) for d in daily_actual}
-    lstm_map = {str(d.date): float(d.total_power) for d in daily_lstm}
-    lgbm_map = {str(d.date): float(d.total_power) for d in daily_lgbm}
+    return response_cache.respond(request, "model-performance", (), lambda: _model_performance(db))
+
+def _model_performance(db: Session):
+    # Daily sums for all models, precomputed in the daily_energy rollup
+    daily = crud.daily_energy(db)
+    actual_map = {day: float(total) for day, total in daily["actual"].items()}
+    lstm_map = {day: float(total) for day, total in daily["lstm"].items()}
+    lgbm_map = {day: float(total) for day, total in daily["lgbm"].items()}
 
     all_dates = sorted(list(set(actual_map.keys()) | set(lstm_map.keys()) | set(lgbm_map.keys())))
     
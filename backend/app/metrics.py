@@ -0,0 +1,200 @@
+import bisect
+import functools
+import threading
+import time
+from contextlib import contextmanager
+
+# Minimal in-process metrics exported in the Prometheus text format (version 0.0.4).
+# Recording is a lock, a bisect and a few additions, cheap enough for every stage call.
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _label_str(names, values):
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + "}"
+
+class Counter:
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def values(self):
+        with self._lock:
+            return dict(self._values)
+
+    def drain(self):
+        """Take and reset the recorded values."""
+        with self._lock:
+            values, self._values = self._values, {}
+        return values
+
+    def merge(self, values):
+        """Add values taken with drain() elsewhere, e.g. in an inference worker."""
+        with self._lock:
+            for key, value in values.items():
+                self._values[key] = self._values.get(key, 0) + value
+
+    def collect(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_label_str(self.labels, key)} {value}")
+        return lines
+
+class Histogram:
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                # Per-bucket counts (non-cumulative) plus +Inf, then sum
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][bisect.bisect_left(self.buckets, value)] += 1
+            series[1] += value
+
+    def drain(self):
+        """Take and reset the recorded series."""
+        with self._lock:
+            series, self._series = self._series, {}
+        return series
+
+    def merge(self, series):
+        """Add series taken with drain() elsewhere, e.g. in an inference worker."""
+        with self._lock:
+            for key, (counts, total) in series.items():
+                mine = self._series.get(key)
+                if mine is None:
+                    self._series[key] = [list(counts), total]
+                else:
+                    mine[0] = [a + b for a, b in zip(mine[0], counts)]
+                    mine[1] += total
+
+    def collect(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + ("+Inf",), counts):
+                    cumulative += count
+                    labels = _label_str(self.labels + ("le",), key + (bound,))
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = _label_str(self.labels, key)
+                lines.append(f"{self.name}_sum{labels} {total}")
+                lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+class Gauge:
+    """Gauge whose samples are read from a callback at scrape time: fn() -> {label_values: value}."""
+
+    def __init__(self, name, help_text, labels, fn):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.fn = fn
+
+    def collect(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        for key, value in sorted(self.fn().items()):
+            lines.append(f"{self.name}{_label_str(self.labels, key)} {value}")
+        return lines
+
+_collectors = []
+
+def register(collector):
+    _collectors.append(collector)
+    return collector
+
+stage_seconds = register(Histogram(
+    "solar_stage_duration_seconds", "Wall time of pipeline stages.", labels=("stage",)))
+stage_rows = register(Counter(
+    "solar_stage_rows_total", "Hourly rows processed by pipeline stages.", labels=("stage",)))
+stage_errors = register(Counter(
+    "solar_stage_errors_total", "Pipeline stage calls that raised.", labels=("stage",)))
+http_seconds = register(Histogram(
+    "http_request_duration_seconds", "API request latency by route.", labels=("method", "route", "status")))
+http_cache_requests = register(Counter(
+    "open_meteo_http_requests_total", "Open-Meteo HTTP requests by cache outcome.", labels=("endpoint", "cache")))
+response_cache_requests = register(Counter(
+    "api_response_cache_requests_total", "Read API requests by response cache outcome.", labels=("endpoint", "cache")))
+weather_frame_cache_requests = register(Counter(
+    "weather_frame_cache_requests_total", "Weather day frame cache lookups by outcome.", labels=("cache",)))
+weather_frame_cache_evictions = register(Counter(
+    "weather_frame_cache_evictions_total", "Weather day frames evicted from the cache."))
+
+@contextmanager
+def timed(stage, rows=None):
+    """Record the duration of the enclosed block under `stage`; rows counts its throughput."""
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        stage_errors.inc(stage)
+        raise
+    finally:
+        stage_seconds.observe(time.perf_counter() - started, stage)
+    if rows is not None:
+        stage_rows.inc(stage, amount=rows)
+
+def instrument(stage, rows=None):
+    """Decorator form of timed(); rows(result) gives the row count of the returned frame."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception:
+                stage_errors.inc(stage)
+                raise
+            finally:
+                stage_seconds.observe(time.perf_counter() - started, stage)
+            stage_rows.inc(stage, amount=rows(result) if rows else len(result))
+            return result
+        return wrapper
+    return decorator
+
+def drain():
+    """Take and reset every counter and histogram of this process, keyed by metric name.
+
+    Inference workers send this back with each result; the API process merge()s it, so
+    stages run in a worker are exported like stages run in-process.
+    """
+    samples = {}
+    for collector in _collectors:
+        if hasattr(collector, "drain"):
+            values = collector.drain()
+            if values:
+                samples[collector.name] = values
+    return samples
+
+def merge(samples):
+    """Add the output of drain() from another process to this process's metrics."""
+    by_name = {collector.name: collector for collector in _collectors}
+    for name, values in samples.items():
+        if name in by_name:
+            by_name[name].merge(values)
+
+def render():
+    """All registered metrics in Prometheus text exposition format."""
+    lines = []
+    for collector in _collectors:
+        lines.extend(collector.collect())
+    return "\n".join(lines) + "\n"
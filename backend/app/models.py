@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Float, String, DateTime, UniqueConstraint
+from sqlalchemy import Column, Integer, Float, String, Date, DateTime, Index, UniqueConstraint, text
 from .database import Base, engine, SessionLocal
 
 class LSTMPrediction(Base):
@@ -103,6 +103,44 @@ class ActualData(Base):
 
     __table_args__ = (UniqueConstraint('timestamp', name='_actual_timestamp_uc'),)
 
+class DailyEnergy(Base):
+    """Per-day rollup of each hourly table, kept in step by crud.write_hourly_frame."""
+    __tablename__ = "daily_energy"
+
+    id = Column(Integer, primary_key=True, index=True)
+    date = Column(Date, nullable=False)
+    model = Column(String, nullable=False)  # actual, lstm or lgbm
+
+    total_mwh = Column(Float)  # Sum of hourly power (MW) over the day
+    peak_mw = Column(Float)
+    hours_generating = Column(Integer)  # Hours with power > 0
+    ghi_sum = Column(Float)  # Sum of the table's hourly GHI (measured for actual, predicted otherwise)
+    hours = Column(Integer)  # Hourly rows present
+
+    __table_args__ = (UniqueConstraint('date', 'model', name='_daily_energy_date_model_uc'),)
+
+class PredictionJob(Base):
+    """A queued or finished prediction run for one model and day (see jobs.py)."""
+    __tablename__ = "prediction_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    model = Column(String, nullable=False)  # lstm or lgbm
+    date = Column(Date, nullable=False)
+    state = Column(String, nullable=False, default="queued")  # queued, running, done or failed
+
+    requests = Column(Integer, nullable=False, default=1)  # Triggers coalesced into this job
+    rows = Column(Integer)  # Hourly rows written
+    error = Column(String)
+    created_at = Column(DateTime, nullable=False)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+
+    # At most one pending job per (model, date); finished jobs are kept as history
+    __table_args__ = (
+        Index("ix_prediction_jobs_pending", "model", "date", unique=True,
+              sqlite_where=text("state IN ('queued', 'running')")),
+    )
+
 def init_db():
     # If standard init is not enough, we can force drop in main.py
     Base.metadata.create_all(bind=engine)
@@ -1,13 +1,10 @@
-import os
-import joblib
 import numpy as np
 import pandas as pd
-import tensorflow as tf
 from datetime import datetime, timedelta
-import openmeteo_requests
-import requests_cache
-from retry_requests import retry
-from .utils import add_solar_features_ist
+from . import metrics
+from .registry import registry
+from .utils import erbs_poa
+from .weather import get_weather_days
 
 # Constants for Power Calculation
 PLANT_CAPACITY_MW = 1.0
@@ -21,210 +18,194 @@ TEMP_COEFF = -0.004
 SUN_ELEVATION_LIMIT = 5
 TILT = 12
 
-LAT = 10.7905
-LON = 78.7047
-SEQ_LEN = 48
-HORIZON = 24
-
-# Features are now loaded from models/configs
-
-# Paths to models
-APP_DIR = os.path.dirname(os.path.abspath(__file__))
-MODELS_DIR = os.path.join(os.path.dirname(APP_DIR), "models")
-
-LSTM_MODEL_PATH = os.path.join(MODELS_DIR, "Tirchy_LSTM_model_nolag.h5")
-X_SCALER_PATH = os.path.join(MODELS_DIR, "X_scaler_lstm.pkl")
-Y_SCALER_PATH = os.path.join(MODELS_DIR, "y_scaler_lstm.pkl")
-LSTM_CONFIG_PATH = os.path.join(MODELS_DIR, "lstm_config.pkl")
-
-LGBM_GHI_PATH = os.path.join(MODELS_DIR, "Tirchy_ML_model copy.pkl")
-BIAS_INFO_PATH = os.path.join(MODELS_DIR, "bias_correction.pkl")
-FEATURES_INFO_PATH = os.path.join(MODELS_DIR, "features.pkl")
-
-# Load models and scalers
-lstm_model = tf.keras.models.load_model(LSTM_MODEL_PATH, compile=False)
-X_scaler = joblib.load(X_SCALER_PATH)
-y_scaler = joblib.load(Y_SCALER_PATH)
-lstm_config = joblib.load(LSTM_CONFIG_PATH)
-
-SEQ_LEN = lstm_config['SEQ_LEN']
-HORIZON = lstm_config['HORIZON']
-LSTM_FEATURES = lstm_config['features']
-
-lgbm_ghi_model = joblib.load(LGBM_GHI_PATH)
-lgbm_bias_info = joblib.load(BIAS_INFO_PATH)
-lgbm_features_info = joblib.load(FEATURES_INFO_PATH)
-lgbm_features = lgbm_features_info['features']
-
-def fetch_weather_data(lat, lon, start_date, end_date, use_archive=False):
-    """Fetch hourly weather data. use_archive=True for historical measurements, False for forecast/inference."""
-    cache_session = requests_cache.CachedSession(".cache", expire_after=3600)
-    retry_session = retry(cache_session, retries=5, backoff_factor=0.2)
-    openmeteo = openmeteo_requests.Client(session=retry_session)
-
-    if use_archive:
-        url = "https://archive-api.open-meteo.com/v1/archive"
-    else:
-        url = "https://api.open-meteo.com/v1/forecast"
-    
-    params = {
-        "latitude": lat,
-        "longitude": lon,
-        "start_date": start_date,
-        "end_date": end_date,
-        "hourly": [
-            "temperature_2m", "relative_humidity_2m", "wind_speed_10m",
-            "wind_direction_10m", "surface_pressure", "cloud_cover",
-            "total_column_integrated_water_vapour", "shortwave_radiation",
-            "direct_normal_irradiance", "diffuse_radiation"
-        ],
-        "timezone": "Asia/Kolkata"
+HOURS_PER_DAY = 24
+
+# Models, scalers and configs are resolved through the registry and loaded on first use
+
+def _day_starts(index):
+    """For each row of an hourly DatetimeIndex, the position of the first row of its local day."""
+    days = index.normalize().asi8
+    positions = np.arange(len(days))
+    new_day = np.r_[True, days[1:] != days[:-1]] if len(days) else np.zeros(0, dtype=bool)
+    return np.maximum.accumulate(np.where(new_day, positions, 0)), np.flatnonzero(new_day)
+
+
+def _rolling_sums(x, day_start, window):
+    """Sum and count of the non-NaN values in each trailing window, clipped to the row's day."""
+    valid = ~np.isnan(x)
+    sums = np.concatenate(([0.0], np.cumsum(np.where(valid, x, 0.0))))
+    counts = np.concatenate(([0], np.cumsum(valid)))
+    end = np.arange(1, len(x) + 1)
+    lo = np.maximum(end - window, day_start)
+    return sums[end] - sums[lo], counts[end] - counts[lo], lo, end
+
+
+def _rolling_mean(x, day_start, window):
+    total, count, _, _ = _rolling_sums(x, day_start, window)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(count > 0, total / count, np.nan)
+
+
+def _rolling_std(x, day_start, window):
+    """Sample std (ddof=1) of each trailing window; 0 where it has fewer than two values."""
+    # Centre first so the sum-of-squares difference does not lose precision
+    centred = x - np.nanmean(x) if np.isfinite(x).any() else x
+    total, count, lo, end = _rolling_sums(centred, day_start, window)
+    valid = ~np.isnan(centred)
+    squares = np.concatenate(([0.0], np.cumsum(np.where(valid, centred * centred, 0.0))))
+    total_sq = squares[end] - squares[lo]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        var = (total_sq - total * total / count) / (count - 1)
+    return np.where(count > 1, np.sqrt(np.maximum(var, 0)), 0.0)
+
+
+def _day_mean(x, day_starts):
+    """Mean of the non-NaN values of each row's day, broadcast back to the rows."""
+    valid = ~np.isnan(x)
+    totals = np.add.reduceat(np.where(valid, x, 0.0), day_starts)
+    counts = np.add.reduceat(valid.astype(np.int64), day_starts)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = totals / counts
+    return np.repeat(means, np.diff(np.r_[day_starts, len(x)]))
+
+
+def lgbm_feature_matrix(df, features):
+    """Build the LGBM inputs for an hourly frame of any number of days as one float32 matrix.
+
+    Columns follow `features`. Rolling windows and the temperature lag restart at each
+    local day, matching one-day-at-a-time scoring. Each feature is written straight into
+    the preallocated matrix; the frame itself is not modified.
+    """
+    n = len(df)
+    col = lambda name: df[name].to_numpy(dtype=np.float64)
+    hour = df.index.hour.to_numpy().astype(np.float64)
+    month = df.index.month.to_numpy()
+    day_start, day_starts = _day_starts(df.index)
+
+    zenith, cos_zenith = col("solar_zenith"), col("cos_zenith")
+    cloud, temperature, humidity = col("cloud_cover"), col("temperature"), col("humidity")
+    water_vapour = 0.1 * humidity
+
+    builders = {
+        # Solar geometry
+        "ghi_potential": lambda: cos_zenith * 1000,
+        "zenith_squared": lambda: zenith ** 2,
+        "cos_zenith_cubed": lambda: cos_zenith ** 3,
+        "zenith_cos_interaction": lambda: zenith * cos_zenith,
+        # Cloud features
+        "cloud_impact": lambda: cloud * cos_zenith,
+        "cloud_squared": lambda: cloud ** 2,
+        "cloud_cubed": lambda: cloud ** 3,
+        "cloud_inv": lambda: 1 / (cloud + 1),
+        # Atmospheric (water_vapour is re-derived from humidity as in training)
+        "water_vapour": lambda: water_vapour,
+        "temp_humidity_ratio": lambda: temperature / (humidity + 1),
+        "vapor_pressure": lambda: water_vapour * col("surface_pressure"),
+        "temp_squared": lambda: temperature ** 2,
+        "humidity_squared": lambda: humidity ** 2,
+        # Time interactions
+        "cloud_hour_interaction": lambda: cloud * np.abs(hour - 12),
+        "temp_hour_interaction": lambda: temperature * np.abs(hour - 12),
+        # Seasonal
+        "is_summer": lambda: (month >= 3) & (month <= 5),
+        "is_monsoon": lambda: (month >= 6) & (month <= 9),
+        "is_winter": lambda: (month >= 11) | (month <= 2),
+        # Rolling features
+        "cloud_roll3_mean": lambda: _rolling_mean(cloud, day_start, 3),
+        "cloud_roll6_mean": lambda: _rolling_mean(cloud, day_start, 6),
+        "temp_roll3_std": lambda: _rolling_std(temperature, day_start, 3),
+        "temp_roll6_mean": lambda: _rolling_mean(temperature, day_start, 6),
+        "humidity_roll3_mean": lambda: _rolling_mean(humidity, day_start, 3),
+        "wind_roll3_mean": lambda: _rolling_mean(col("wind_speed"), day_start, 3),
+        # Lag features (defaults - no historical data provided for LGBM sequence)
+        "ghi_lag24": lambda: 450.0,
+        "cloud_lag24": lambda: 50.0,
+        "temp_lag24": lambda: _day_mean(temperature, day_starts),
+        # Clear sky index (default)
+        "clearsky_index_roll24": lambda: 0.6,
+        "clearsky_index_roll12": lambda: 0.6,
+        "hour": lambda: hour,
+        "month": lambda: month,
     }
-    
-    responses = openmeteo.weather_api(url, params=params)
-    response = responses[0]
-    hourly = response.Hourly()
-    
-    timestamps = pd.date_range(
-        start=pd.to_datetime(hourly.Time(), unit="s", utc=True),
-        periods=len(hourly.Variables(0).ValuesAsNumpy()),
-        freq="h"
-    ).tz_convert("Asia/Kolkata")
-
-    df = pd.DataFrame({
-        "timestamp": timestamps,
-        "temperature": hourly.Variables(0).ValuesAsNumpy(),
-        "humidity": hourly.Variables(1).ValuesAsNumpy(),
-        "wind_speed": hourly.Variables(2).ValuesAsNumpy(),
-        "wind_direction": hourly.Variables(3).ValuesAsNumpy(),
-        "surface_pressure": hourly.Variables(4).ValuesAsNumpy(),
-        "cloud_cover": hourly.Variables(5).ValuesAsNumpy(),
-        "water_vapour": hourly.Variables(6).ValuesAsNumpy(),
-        "ghi": hourly.Variables(7).ValuesAsNumpy(),
-        "dni": hourly.Variables(8).ValuesAsNumpy(),
-        "dhi": hourly.Variables(9).ValuesAsNumpy(),
-    })
-    return df
 
-def add_advanced_features_lgbm(df):
-    """Add all engineered features for LGBM based on new model requirements."""
-    df = df.copy()
-    
-    # Ensure hour and month are present
-    if "hour" not in df.columns:
-        if isinstance(df.index, pd.DatetimeIndex):
-            df["hour"] = df.index.hour
-        else:
-            df["hour"] = df["timestamp"].dt.hour
-    if "month" not in df.columns:
-        if isinstance(df.index, pd.DatetimeIndex):
-            df["month"] = df.index.month
-        else:
-            df["month"] = df["timestamp"].dt.month
-
-    # Solar geometry
-    df['ghi_potential'] = df['cos_zenith'] * 1000
-    df['zenith_squared'] = df['solar_zenith'] ** 2
-    df['cos_zenith_cubed'] = df['cos_zenith'] ** 3
-    df['zenith_cos_interaction'] = df['solar_zenith'] * df['cos_zenith']
-    
-    # Cloud features
-    df['cloud_impact'] = df['cloud_cover'] * df['cos_zenith']
-    df['cloud_squared'] = df['cloud_cover'] ** 2
-    df['cloud_cubed'] = df['cloud_cover'] ** 3
-    df['cloud_inv'] = 1 / (df['cloud_cover'] + 1)
-    
-    # Atmospheric
-    df['temp_humidity_ratio'] = df['temperature'] / (df['humidity'] + 1)
-    df['water_vapour'] = 0.1 * df['humidity'] # Overwrite with engineering from snippet
-    df['vapor_pressure'] = df['water_vapour'] * df['surface_pressure']
-    df['temp_squared'] = df['temperature'] ** 2
-    df['humidity_squared'] = df['humidity'] ** 2
-    
-    # Time interactions
-    df['cloud_hour_interaction'] = df['cloud_cover'] * np.abs(df['hour'] - 12)
-    df['temp_hour_interaction'] = df['temperature'] * np.abs(df['hour'] - 12)
-    
-    # Seasonal
-    df['is_summer'] = ((df['month'] >= 3) & (df['month'] <= 5)).astype(int)
-    df['is_monsoon'] = ((df['month'] >= 6) & (df['month'] <= 9)).astype(int)
-    df['is_winter'] = ((df['month'] >= 11) | (df['month'] <= 2)).astype(int)
-    
-    # Rolling features
-    df['cloud_roll3_mean'] = df['cloud_cover'].rolling(3, min_periods=1).mean()
-    df['cloud_roll6_mean'] = df['cloud_cover'].rolling(6, min_periods=1).mean()
-    df['temp_roll3_std'] = df['temperature'].rolling(3, min_periods=1).std().fillna(0)
-    df['temp_roll6_mean'] = df['temperature'].rolling(6, min_periods=1).mean()
-    df['humidity_roll3_mean'] = df['humidity'].rolling(3, min_periods=1).mean()
-    df['wind_roll3_mean'] = df['wind_speed'].rolling(3, min_periods=1).mean()
-    
-    # Lag features (use defaults - no historical data provided for LGBM sequence)
-    df['ghi_lag24'] = 450.0
-    df['cloud_lag24'] = 50.0
-    df['temp_lag24'] = df['temperature'].mean()
-    
-    # Clear sky index (use default)
-    df['clearsky_index_roll24'] = 0.6
-    df['clearsky_index_roll12'] = 0.6
-    return df
-# In your inference code - simplified calculate_power
-def calculate_power(df):
-    df = df.copy()
+    X = np.empty((n, len(features)), dtype=np.float32)
+    if n == 0:
+        return X
+    for j, name in enumerate(features):
+        X[:, j] = builders[name]() if name in builders else col(name)
+    return X
 
-    df["solar_elevation"] = 90 - df["solar_zenith"]
 
+def dc_power(poa, zenith, temperature):
+    """DC power (MW) from POA irradiance with the NOCT cell-temperature model, on plain arrays."""
     # Zero irradiance if sun too low
-    df.loc[df["solar_elevation"] < SUN_ELEVATION_LIMIT, "poa_irradiance"] = 0
+    poa = np.where(90 - zenith < SUN_ELEVATION_LIMIT, 0, poa)
+
+    # Cell temperature (NOCT model) and temperature correction factor
+    cell_temperature = temperature + (NOCT - 20) / 800 * poa
+    temp_factor = 1 + TEMP_COEFF * (cell_temperature - 25)
+
+    # NaN (missing weather) propagates like the pandas clip did
+    return np.maximum(poa * TOTAL_PV_AREA * PV_EFFICIENCY * temp_factor * DERATE / 1e6, 0)
+
+
+@metrics.instrument("power", rows=lambda result: np.size(result[0]))
+def irradiance_to_power(ghi, zenith, azimuth, doy, temperature):
+    """Fused Erbs + isotropic POA + NOCT kernel: returns (poa_irradiance, power_mw).
+
+    All inputs are ndarrays of broadcastable shape, e.g. (n_days, 24) to score many days
+    or scenarios in one call. poa_irradiance is the clipped plane-of-array value before
+    the low-sun cutoff, matching the poa_irradiance column of the pandas path.
+    """
+    poa, _, _ = erbs_poa(ghi, zenith, azimuth, doy, tilt=TILT)
+    return poa, dc_power(poa, zenith, temperature)
 
-    # Cell temperature (NOCT model)
-    df["cell_temperature"] = (
-        df["temperature"] + (NOCT - 20) / 800 * df["poa_irradiance"]
+
+def add_power(df):
+    """Set poa_irradiance and power on an enriched frame from its ghi_pred column."""
+    poa, power = irradiance_to_power(
+        df["ghi_pred"].to_numpy(dtype=float),
+        df["solar_zenith"].to_numpy(dtype=float),
+        df["solar_azimuth"].to_numpy(dtype=float),
+        df.index.dayofyear.to_numpy(),
+        df["temperature"].to_numpy(dtype=float),
     )
+    df["poa_irradiance"] = poa
+    df["power"] = power
+    return df
 
-    # Temperature correction factor
-    df["temp_factor"] = 1 + TEMP_COEFF * (df["cell_temperature"] - 25)
 
-    # DC Power (MW)
-    df["dc_power_mw"] = (
-        df["poa_irradiance"]
-        * TOTAL_PV_AREA
-        * PV_EFFICIENCY
-        * df["temp_factor"]
-        * DERATE
-    ) / 1e6
+def predict_lstm_for_day(target_date_str, weather_df=None):
+    """Run LSTM prediction for a specific day using 48h history.
 
-    return df["dc_power_mw"].clip(lower=0)
+    weather_df optionally supplies the solar-enriched forecast rows for the target day
+    and the two days before it; otherwise they come from the weather day cache.
+    """
+    return predict_lstm_for_range(target_date_str, target_date_str, weather_df=weather_df)
 
 
-def predict_lstm_for_day(target_date_str):
-    """Run LSTM prediction for a specific day using 48h history."""
-    target_dt = datetime.strptime(target_date_str, "%Y-%m-%d")
-    start_date = (target_dt - timedelta(days=2)).strftime("%Y-%m-%d")
-    end_date = target_date_str
-    
-    df = fetch_weather_data(LAT, LON, start_date, end_date)
-    df = add_solar_features_ist(df, LAT, LON)
-    df = df.fillna(0)
-    
-    # Feature engineering for LSTM
-    df["water_vapour"] = 0.1 * df["humidity"]
-    
-    X_scaled = X_scaler.transform(df[LSTM_FEATURES])
-    # Sequence: hours -72 to -24 (the 48 hours before target day)
-    X_seq = X_scaled[-SEQ_LEN - HORIZON : -HORIZON].reshape(1, SEQ_LEN, len(LSTM_FEATURES))
-    
-    y_pred_scaled = lstm_model.predict(X_seq, verbose=0).reshape(-1, 1)
-    y_pred = y_scaler.inverse_transform(y_pred_scaled).flatten()
-    
-    # Target day data (last 24 hours of fetched data)
-    df_target = df.iloc[-HORIZON:].copy()
-    df_target["ghi_pred"] = np.maximum(y_pred, 0)
-    
-    # Calculate POA irradiance using predicted GHI
-    df_target = add_solar_features_ist(df_target, LAT, LON)
+def predict_lstm_for_range(start_date_str, end_date_str, weather_df=None, model_name=None):
+    """Run LSTM prediction for every day in [start, end] as one batched model.predict call.
+
+    Uses the active LSTM version unless model_name is given. weather_df optionally
+    supplies the solar-enriched forecast rows from two days before start through end;
+    otherwise they come from the weather day cache.
+    """
+    lstm = registry.get(model_name) if model_name else registry.active("lstm")
+    df, n_days = _lstm_input_frame(start_date_str, end_date_str, weather_df, [lstm])
+    ghi_pred = _lstm_ghi(lstm, df, n_days)
+
+    # Stored rows carry the water_vapour the model actually saw
+    if lstm.humidity_water_vapour:
+        df["water_vapour"] = df["water_vapour_humidity"]
+    df = df.drop(columns="water_vapour_humidity")
+
+    # Target days (last n_days * 24 hours of fetched data)
+    df_target = df.iloc[-n_days * HOURS_PER_DAY:].copy()
+    df_target["ghi_pred"] = ghi_pred
     
-    # Calculate Physical Power
-    df_target["power"] = calculate_power(df_target)
+    # POA irradiance and physical power from predicted GHI
+    df_target = add_power(df_target)
     
     # Night cleanup
     df_target.loc[df_target["cos_zenith"] <= 0, ["ghi_pred", "power"]] = 0
@@ -232,42 +213,122 @@ def predict_lstm_for_day(target_date_str):
     return df_target.reset_index()
 
 
-def predict_lgbm_for_day(target_date_str):
-    """Run LGBM prediction for a specific day with advanced features and bias correction."""
-    df_target = fetch_weather_data(LAT, LON, target_date_str, target_date_str)
-    df_target = add_solar_features_ist(df_target, LAT, LON)
-    
-    # Add advanced features
-    df_target = add_advanced_features_lgbm(df_target)
-    
-    # GHI Prediction
-    predictions = lgbm_ghi_model.predict(df_target[lgbm_features])
-    df_target["ghi_pred"] = np.maximum(predictions + lgbm_bias_info['validation_bias'], 0)
+def compare_lstm_versions(start_date_str, end_date_str, model_names, weather_df=None):
+    """Score [start, end] with several LSTM versions over one shared feature frame.
+
+    Returns an hourly frame with timestamp plus ghi_pred_<name> and power_<name> per version.
+    Weather is fetched and solar-enriched once; each version then runs one batched pass.
+    """
+    versions = [registry.get(name) for name in model_names]
+    df, n_days = _lstm_input_frame(start_date_str, end_date_str, weather_df, versions)
+    df_target = df.iloc[-n_days * HOURS_PER_DAY:]
+    night = df_target["cos_zenith"].to_numpy() <= 0
+
+    result = pd.DataFrame({"timestamp": df_target.index})
+    for lstm in versions:
+        ghi = _lstm_ghi(lstm, df, n_days)
+        _, power = irradiance_to_power(
+            ghi,
+            df_target["solar_zenith"].to_numpy(dtype=float),
+            df_target["solar_azimuth"].to_numpy(dtype=float),
+            df_target.index.dayofyear.to_numpy(),
+            df_target["temperature"].to_numpy(dtype=float),
+        )
+        result[f"ghi_pred_{lstm.name}"] = np.where(night, 0, ghi)
+        result[f"power_{lstm.name}"] = np.where(night, 0, power)
+    return result
+
+
+def _lstm_input_frame(start_date_str, end_date_str, weather_df, versions):
+    """Filled feature frame covering [start, end] plus the longest lookback among versions."""
+    start_dt = datetime.strptime(start_date_str, "%Y-%m-%d")
+    end_dt = datetime.strptime(end_date_str, "%Y-%m-%d")
+    n_days = (end_dt - start_dt).days + 1
+    for lstm in versions:
+        if lstm.horizon != HOURS_PER_DAY:
+            raise ValueError(f"{lstm.name}: only day-ahead models (horizon {HOURS_PER_DAY}) are supported")
+    if weather_df is None:
+        lookback_days = -(-max(lstm.seq_len for lstm in versions) // HOURS_PER_DAY)
+        weather_df = get_weather_days((start_dt - timedelta(days=lookback_days)).date(), end_dt.date())
+
+    df = weather_df.copy()
+    df = df.fillna(0)
+    # Some versions were trained on water_vapour derived from humidity rather than the API value
+    df["water_vapour_humidity"] = 0.1 * df["humidity"]
+    return df, n_days
+
+
+def _lstm_ghi(lstm, df, n_days):
+    """Predicted GHI for the last n_days of df, from one batched forward pass of `lstm`."""
+    seq_len, horizon = lstm.seq_len, lstm.horizon
+    columns = [
+        "water_vapour_humidity" if name == "water_vapour" and lstm.humidity_water_vapour else name
+        for name in lstm.features
+    ]
+    features = df[columns].set_axis(lstm.features, axis=1)
+    X_scaled = np.asarray(lstm.x_scaler.transform(features), dtype=np.float32)
+    first = len(X_scaled) - n_days * horizon - seq_len
+    if first < 0:
+        raise ValueError(f"Need {n_days * horizon + seq_len} hourly rows for {n_days} day(s), got {len(X_scaled)}")
+
+    # Day i is predicted from the seq_len hours before it: rows [first + i*horizon, first + i*horizon + seq_len).
+    # sliding_window_view + stepping returns strided views of X_scaled, not copies.
+    windows = np.lib.stride_tricks.sliding_window_view(X_scaled[first:], seq_len, axis=0)[::horizon][:n_days]
+    X_seq = windows.transpose(0, 2, 1)  # (n_days, seq_len, n_features)
     
-    # Calculate POA irradiance using predicted GHI
-    df_target = add_solar_features_ist(df_target, LAT, LON)
+    with metrics.timed("lstm_predict", rows=n_days * horizon):
+        y_pred_scaled = lstm.model.predict(X_seq, verbose=0).reshape(-1, 1)
+    y_pred = lstm.y_scaler.inverse_transform(y_pred_scaled).flatten()
+    return np.maximum(y_pred, 0)
+
+
+def predict_lgbm_for_day(target_date_str, weather_df=None):
+    """Run LGBM prediction for a specific day with advanced features and bias correction."""
+    return predict_lgbm_for_range(target_date_str, target_date_str, weather_df=weather_df)
+
+
+def predict_lgbm_for_range(start_date_str, end_date_str, weather_df=None):
+    """Run LGBM prediction for every day in [start, end]: one feature matrix, one predict call.
+
+    weather_df optionally supplies the solar-enriched forecast rows for [start, end];
+    otherwise they come from the weather day cache.
+    """
+    if weather_df is None:
+        start_date = datetime.strptime(start_date_str, "%Y-%m-%d").date()
+        end_date = datetime.strptime(end_date_str, "%Y-%m-%d").date()
+        weather_df = get_weather_days(start_date, end_date)
+    lgbm = registry.active("lgbm")
+    df_target = weather_df.copy()
+
+    # GHI Prediction; the frame wrapper keeps feature names for the model without copying X
+    with metrics.timed("lgbm_features", rows=len(df_target)):
+        X = lgbm_feature_matrix(df_target, lgbm.features)
+    with metrics.timed("lgbm_predict", rows=len(X)):
+        predictions = lgbm.model.predict(pd.DataFrame(X, columns=lgbm.features, copy=False))
+    df_target["ghi_pred"] = np.maximum(predictions + lgbm.bias, 0)
+    df_target["water_vapour"] = 0.1 * df_target["humidity"]
     
-    # Physical Power Calculation
-    df_target["power"] = calculate_power(df_target)
+    # POA irradiance and physical power from predicted GHI
+    df_target = add_power(df_target)
     
     # Night cleanup
     df_target.loc[df_target["cos_zenith"] <= 0, ["ghi_pred", "power"]] = 0
     
     return df_target.reset_index()
 
-def fetch_actual_data_for_day(date_str):
+def fetch_actual_data_for_day(date_str, weather_df=None):
     """Fetch archival weather data and calculate actual power generation."""
-    # Use fetch_weather_data with use_archive=True for ground truth
-    df = fetch_weather_data(LAT, LON, date_str, date_str, use_archive=True)
-    df = add_solar_features_ist(df, LAT, LON)
+    # Archive (measured) data is the ground truth
+    if weather_df is None:
+        target_date = datetime.strptime(date_str, "%Y-%m-%d").date()
+        weather_df = get_weather_days(target_date, target_date, source="archive")
+    df = weather_df.copy()
     
     # For actual data, 'ghi' from API is used as the 'pred' for the unified power function
     df["ghi_pred"] = df["ghi"]
     
-    # Calculate POA irradiance using GHI
-    df = add_solar_features_ist(df, LAT, LON)
-    
-    df["power"] = calculate_power(df)
+    # POA irradiance and physical power from measured GHI
+    df = add_power(df)
     
     # Night cleanup
     df.loc[df["cos_zenith"] <= 0, ["ghi_pred", "power"]] = 0
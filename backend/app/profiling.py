@@ -0,0 +1,225 @@
+import asyncio
+import contextvars
+import functools
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from contextlib import contextmanager
+from datetime import datetime
+
+from fastapi.routing import APIRoute
+
+# Opt-in sampling profiler. With PROFILING_ENABLED unset nothing is installed: no
+# middleware, no route wrapper, no sampler thread. When enabled, a request asks for a
+# profile with the X-Profile: 1 header or ?profile=1, and the thread running its
+# endpoint is sampled every PROFILE_INTERVAL seconds. Profiles are kept in a bounded
+# ring and served as collapsed stacks (flamegraph.pl / speedscope "folded" format).
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "").lower() in ("1", "true", "yes")
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL", "0.005"))
+PROFILE_RING_SIZE = int(os.getenv("PROFILE_RING_SIZE", "20"))
+PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", "300"))
+PROFILE_BACKFILL = os.getenv("PROFILE_BACKFILL", "").lower() in ("1", "true", "yes")
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+
+profiles = deque(maxlen=PROFILE_RING_SIZE)
+_profiles_lock = threading.Lock()
+
+# Set by the middleware for requests that asked to be profiled; the route wrapper
+# records the profile id in the dict so the middleware can return it in a header.
+_requested = contextvars.ContextVar("profile_requested", default=None)
+
+# Profile being captured around the current code, so inference calls made under it can
+# be sampled in the worker process too (see inference._submit)
+_active = contextvars.ContextVar("active_profile", default=None)
+
+class Profile:
+    def __init__(self, label):
+        self.id = uuid.uuid4().hex[:12]
+        self.label = label
+        self.started_at = datetime.now()
+        self.duration = None
+        self.samples = 0
+        self.stacks = Counter()
+        self.paused = set()  # Ids of sampled threads waiting on another process
+
+    def summary(self):
+        return {
+            "id": self.id,
+            "label": self.label,
+            "started_at": self.started_at.isoformat(),
+            "duration_seconds": self.duration,
+            "samples": self.samples,
+            "interval_seconds": PROFILE_INTERVAL,
+        }
+
+    def folded(self):
+        """Collapsed stacks, one 'outer;...;inner count' line per distinct stack."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+def _frame_name(code):
+    filename = os.path.basename(code.co_filename).replace(" ", "_")
+    return f"{code.co_name}@{filename}:{code.co_firstlineno}"
+
+def _collapse(frame):
+    names = []
+    while frame is not None:
+        names.append(_frame_name(frame.f_code))
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+class _Sampler(threading.Thread):
+    """Samples one thread's stack at a fixed interval until stopped or PROFILE_MAX_SECONDS."""
+
+    def __init__(self, thread_id, profile):
+        super().__init__(name="profiler", daemon=True)
+        self.thread_id = thread_id
+        self.profile = profile
+        self._stopped = threading.Event()
+
+    def run(self):
+        deadline = time.monotonic() + PROFILE_MAX_SECONDS
+        while not self._stopped.wait(PROFILE_INTERVAL) and time.monotonic() < deadline:
+            if self.thread_id in self.profile.paused:
+                continue
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.profile.stacks[_collapse(frame)] += 1
+                self.profile.samples += 1
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+@contextmanager
+def _sampling(profile):
+    sampler = _Sampler(threading.get_ident(), profile)
+    started = time.perf_counter()
+    sampler.start()
+    try:
+        yield profile
+    finally:
+        sampler.stop()
+        profile.duration = round(time.perf_counter() - started, 4)
+
+@contextmanager
+def capture(label):
+    """Profile the current thread for the duration of the block and store the result."""
+    profile = Profile(label)
+    token = _active.set(profile)
+    try:
+        with _sampling(profile):
+            yield profile
+    finally:
+        _active.reset(token)
+        with _profiles_lock:
+            profiles.append(profile)
+        logging.info(f"Captured profile {profile.id} for {label}: {profile.samples} samples")
+
+def active():
+    """The profile being captured around the current code, or None."""
+    return _active.get()
+
+@contextmanager
+def sampled():
+    """Sample the current thread for the block without storing a profile.
+
+    Yields the Profile; its stacks start below the caller's frame. Used by inference
+    workers to sample a call on behalf of a profile captured in the API process.
+    """
+    caller = _collapse(sys._getframe().f_back.f_back)
+    profile = Profile(None)
+    try:
+        with _sampling(profile):
+            yield profile
+    finally:
+        stacks = Counter()
+        for stack, count in profile.stacks.items():
+            if stack.startswith(caller + ";"):
+                stacks[stack[len(caller) + 1:]] += count
+        profile.stacks = stacks
+        profile.samples = sum(stacks.values())
+
+@contextmanager
+def remote(profile):
+    """Stop sampling the current thread while it waits on another process for `profile`.
+
+    Yields add(stacks), which files the stacks the other process sampled under the
+    current call stack, so they take the place of the wait.
+    """
+    thread_id = threading.get_ident()
+    call_site = _collapse(sys._getframe().f_back.f_back)
+
+    def add(stacks):
+        for stack, count in stacks.items():
+            profile.stacks[f"{call_site};{stack}"] += count
+            profile.samples += count
+
+    profile.paused.add(thread_id)
+    try:
+        yield add
+    finally:
+        profile.paused.discard(thread_id)
+
+def requested():
+    """Whether the current request asked to be profiled."""
+    return _requested.get() is not None
+
+def get_profile(profile_id):
+    with _profiles_lock:
+        return next((p for p in profiles if p.id == profile_id), None)
+
+def list_profiles():
+    with _profiles_lock:
+        return [p.summary() for p in reversed(profiles)]
+
+async def profile_request_middleware(request, call_next):
+    """Mark requests carrying X-Profile: 1 or ?profile=1 and return the profile id header."""
+    flag = request.headers.get(PROFILE_HEADER) or request.query_params.get("profile")
+    if flag not in ("1", "true", "yes"):
+        return await call_next(request)
+    holder = {}
+    token = _requested.set(holder)
+    try:
+        response = await call_next(request)
+    finally:
+        _requested.reset(token)
+    if "id" in holder:
+        response.headers[PROFILE_ID_HEADER] = holder["id"]
+    return response
+
+def _wrap_endpoint(endpoint, label):
+    # functools.wraps keeps the signature FastAPI reads for parameters and dependencies
+    if asyncio.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def async_wrapper(*args, **kwargs):
+            holder = _requested.get()
+            if holder is None:
+                return await endpoint(*args, **kwargs)
+            with capture(label) as profile:
+                holder["id"] = profile.id
+                return await endpoint(*args, **kwargs)
+        return async_wrapper
+
+    @functools.wraps(endpoint)
+    def wrapper(*args, **kwargs):
+        # Sync endpoints run in the threadpool, so this samples only this request's thread
+        holder = _requested.get()
+        if holder is None:
+            return endpoint(*args, **kwargs)
+        with capture(label) as profile:
+            holder["id"] = profile.id
+            return endpoint(*args, **kwargs)
+    return wrapper
+
+class ProfiledRoute(APIRoute):
+    """APIRoute whose endpoint is sampled when the request asked for a profile."""
+
+    def __init__(self, path, endpoint, **kwargs):
+        methods = ",".join(sorted(kwargs.get("methods") or ["GET"]))
+        super().__init__(path, _wrap_endpoint(endpoint, f"{methods} {path}"), **kwargs)
@@ -0,0 +1,251 @@
+import json
+import logging
+import os
+import threading
+import time
+import joblib
+
+from . import lstm_numpy
+
+# Models are resolved by name and their artifacts (weights, scalers, configs) are loaded
+# on first use, then kept warm. Nothing is read from disk at import time.
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+MODELS_DIR = os.path.join(os.path.dirname(APP_DIR), "models")
+
+# Artifact file names per model. LSTM configs are either the original lstm_config.pkl
+# (features/SEQ_LEN/HORIZON) or the <n>_LSTM_model_metadata.json files (features/seq_len/horizon).
+# humidity_water_vapour: the model was trained with water_vapour = 0.1 * humidity.
+MODEL_SPECS = {
+    "lstm": {
+        "kind": "lstm",
+        "model": "Tirchy_LSTM_model_nolag.h5",
+        "x_scaler": "X_scaler_lstm.pkl",
+        "y_scaler": "y_scaler_lstm.pkl",
+        "config": "lstm_config.pkl",
+        "humidity_water_vapour": True,
+    },
+    "lstm2": {
+        "kind": "lstm",
+        "model": "2ghi_lstm_model.keras",
+        "x_scaler": "X_scaler_2LSTM.pkl",
+        "y_scaler": "y_scaler_2LSTM.pkl",
+        "config": "2_LSTM_model_metadata.json",
+    },
+    "lstm3": {
+        "kind": "lstm",
+        "model": "3ghi_lstm_model.keras",
+        "x_scaler": "X_scaler_3LSTM.pkl",
+        "y_scaler": "y_scaler_3LSTM.pkl",
+        "config": "3_LSTM_model_metadata.json",
+    },
+    "lgbm": {
+        "kind": "lgbm",
+        "model": "Tirchy_ML_model copy.pkl",
+        "bias": "bias_correction.pkl",
+        "features": "features.pkl",
+    },
+}
+
+# Artifact keys each kind of spec must name
+SPEC_FILES = {
+    "lstm": ("model", "x_scaler", "y_scaler", "config"),
+    "lgbm": ("model", "bias", "features"),
+}
+
+# Model serving each kind until another version is promoted
+ACTIVE_MODELS = {
+    "lstm": os.getenv("ACTIVE_LSTM_MODEL", "lstm"),
+    "lgbm": os.getenv("ACTIVE_LGBM_MODEL", "lgbm"),
+}
+
+class LSTMModel:
+    """A loaded LSTM version: network, scalers and its sequence config."""
+
+    def __init__(self, name, model, x_scaler, y_scaler, config, humidity_water_vapour=False):
+        self.name = name
+        self.model = model
+        self.x_scaler = x_scaler
+        self.y_scaler = y_scaler
+        self.features = list(config["features"])
+        self.seq_len = int(config.get("SEQ_LEN", config.get("seq_len")))
+        self.horizon = int(config.get("HORIZON", config.get("horizon")))
+        self.humidity_water_vapour = humidity_water_vapour
+
+        input_shape = getattr(model, "input_shape", None)
+        if input_shape and input_shape[1] not in (None, self.seq_len):
+            logging.warning(f"{name}: model input has {input_shape[1]} steps, config says seq_len={self.seq_len}")
+
+class LGBMModel:
+    """The loaded LightGBM GHI model with its feature list and bias correction."""
+
+    def __init__(self, name, model, bias_info, features_info):
+        self.name = name
+        self.model = model
+        self.bias = float(bias_info["validation_bias"])
+        self.features = list(features_info["features"])
+
+def _rss_bytes():
+    """Current resident set size, or None where /proc is not available."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+def _load_file(path):
+    if path.endswith((".h5", ".keras")):
+        return lstm_numpy.load_model(path)
+    if path.endswith(".json"):
+        with open(path) as f:
+            return json.load(f)
+    return joblib.load(path)
+
+class ModelRegistry:
+    """Lazily loaded, process-wide cache of model artifacts keyed by file name.
+
+    get(name) builds the model from its spec on first call. Each artifact records its
+    load time and the process RSS growth while it was loaded, reported by stats().
+    """
+
+    def __init__(self, models_dir=MODELS_DIR, specs=MODEL_SPECS, active=ACTIVE_MODELS):
+        self.models_dir = models_dir
+        self.specs = dict(specs)
+        self._active = dict(active)
+        self._artifacts = {}
+        self._artifact_stats = {}
+        self._models = {}
+        self._lock = threading.RLock()
+
+    def artifact(self, filename):
+        """Load (once) and return the object stored in models_dir/filename."""
+        if filename in self._artifacts:
+            return self._artifacts[filename]
+        with self._lock:
+            if filename not in self._artifacts:
+                path = os.path.join(self.models_dir, filename)
+                rss_before = _rss_bytes()
+                started = time.perf_counter()
+                value = _load_file(path)
+                elapsed = time.perf_counter() - started
+                rss_after = _rss_bytes()
+                self._artifact_stats[filename] = {
+                    "load_seconds": round(elapsed, 4),
+                    "rss_delta_bytes": rss_after - rss_before if rss_before is not None else None,
+                    "file_bytes": os.path.getsize(path),
+                }
+                self._artifacts[filename] = value
+                logging.info(f"Loaded {filename} in {elapsed * 1000:.0f} ms")
+        return self._artifacts[filename]
+
+    def get(self, name):
+        """The loaded model called `name`, loading its artifacts on first use."""
+        model = self._models.get(name)
+        if model is not None:
+            return model
+        if name not in self.specs:
+            raise KeyError(f"Unknown model: {name}")
+        with self._lock:
+            if name not in self._models:
+                self._models[name] = self._build(name, self.specs[name])
+        return self._models[name]
+
+    def _build(self, name, spec):
+        if spec["kind"] == "lstm":
+            return LSTMModel(
+                name,
+                self.artifact(spec["model"]),
+                self.artifact(spec["x_scaler"]),
+                self.artifact(spec["y_scaler"]),
+                self.artifact(spec["config"]),
+                humidity_water_vapour=spec.get("humidity_water_vapour", False),
+            )
+        if spec["kind"] == "lgbm":
+            return LGBMModel(
+                name,
+                self.artifact(spec["model"]),
+                self.artifact(spec["bias"]),
+                self.artifact(spec["features"]),
+            )
+        raise ValueError(f"Unknown model kind for {name}: {spec['kind']}")
+
+    def lstm_seq_len(self, name):
+        """Input sequence length of LSTM `name`, read from its config alone (no weights loaded)."""
+        config = self.artifact(self.specs[name]["config"])
+        return int(config.get("SEQ_LEN", config.get("seq_len")))
+
+    def register(self, name, spec):
+        """Add a model version whose artifacts are files in models_dir. Names cannot be reused."""
+        kind = spec.get("kind")
+        if kind not in SPEC_FILES:
+            raise ValueError(f"kind must be one of {sorted(SPEC_FILES)}")
+        for key in SPEC_FILES[kind]:
+            filename = spec.get(key)
+            if not filename or os.path.basename(filename) != filename:
+                raise ValueError(f"{key} must be a file name inside the models directory")
+            if not os.path.exists(os.path.join(self.models_dir, filename)):
+                raise ValueError(f"{key} file not found: {filename}")
+        with self._lock:
+            if name in self.specs:
+                raise ValueError(f"Model {name} is already registered")
+            self.specs[name] = dict(spec)
+        logging.info(f"Registered model {name}")
+
+    def unregister(self, name):
+        """Forget a version that is not serving, e.g. one whose artifacts failed to load."""
+        with self._lock:
+            if name in self._active.values():
+                raise ValueError(f"Model {name} is active and cannot be unregistered")
+            self.specs.pop(name, None)
+            self._models.pop(name, None)
+        logging.info(f"Unregistered model {name}")
+
+    def active(self, kind):
+        """The model currently serving `kind` ("lstm" or "lgbm")."""
+        return self.get(self._active[kind])
+
+    def active_name(self, kind):
+        return self._active[kind]
+
+    def promote(self, name, load=True):
+        """Make `name` the serving model of its kind. Returns the previously active name.
+
+        The new version is fully loaded before the swap, and callers that already
+        hold the old model object finish with it, so no request sees a half-loaded model.
+        load=False only switches the name, for a process that does not serve inference
+        itself (the workers load the version before they swap).
+        """
+        if name not in self.specs:
+            raise KeyError(f"Unknown model: {name}")
+        kind = self.specs[name]["kind"]
+        if load:
+            self.get(name)
+        with self._lock:
+            previous = self._active[kind]
+            self._active[kind] = name
+        logging.info(f"Promoted {name} to active {kind} model (was {previous})")
+        return previous
+
+    def warm(self, names):
+        """Load the given models now, e.g. before serving traffic."""
+        for name in names:
+            self.get(name)
+
+    def stats(self):
+        with self._lock:
+            models = {}
+            for name, spec in self.specs.items():
+                files = [spec[key] for key in SPEC_FILES[spec["kind"]]]
+                models[name] = {
+                    "kind": spec["kind"],
+                    "loaded": name in self._models,
+                    "active": self._active.get(spec["kind"]) == name,
+                    "artifacts": {f: self._artifact_stats.get(f) for f in files},
+                }
+            return {
+                "active": dict(self._active),
+                "models": models,
+                "artifacts_loaded": len(self._artifacts),
+                "total_load_seconds": round(sum(s["load_seconds"] for s in self._artifact_stats.values()), 4),
+            }
+
+registry = ModelRegistry()
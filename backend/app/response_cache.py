@@ -0,0 +1,88 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+from . import crud, metrics
+
+# Rendered JSON responses of the read endpoints, keyed by endpoint and normalized query
+# parameters. Everything they return derives from the hourly tables (and the rollup
+# written with them), so the whole cache is dropped when crud.data_version moves.
+# A repeat request costs a dict lookup; a client holding the same ETag gets a 304.
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "256"))
+
+_entries = OrderedDict()
+_entries_version = None
+_lock = threading.Lock()
+
+def _render(payload):
+    # Same encoding as FastAPI's JSONResponse, so cached bodies match uncached ones
+    return json.dumps(
+        jsonable_encoder(payload), ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+def _etag(body):
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+def _matches(if_none_match, etag):
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+def _lookup(key, version):
+    global _entries_version
+    with _lock:
+        if _entries_version != version:
+            _entries.clear()
+            _entries_version = version
+            return None
+        entry = _entries.get(key)
+        if entry is not None:
+            _entries.move_to_end(key)
+        return entry
+
+def _store(key, version, entry):
+    with _lock:
+        # A write committed while the payload was built: it may be stale, don't keep it
+        if _entries_version != version:
+            return
+        _entries[key] = entry
+        while len(_entries) > RESPONSE_CACHE_SIZE:
+            _entries.popitem(last=False)
+
+def respond(request: Request, endpoint, key, build):
+    """JSON response for (endpoint, key), calling build() only when not cached.
+
+    The data version is read before building, so a payload that raced a write is
+    served once but never cached.
+    """
+    version = crud.data_version
+    cache_key = (endpoint,) + tuple(key)
+    entry = _lookup(cache_key, version)
+    if entry is None:
+        metrics.response_cache_requests.inc(endpoint, "miss")
+        body = _render(build())
+        entry = (body, _etag(body))
+        _store(cache_key, version, entry)
+    else:
+        metrics.response_cache_requests.inc(endpoint, "hit")
+
+    body, etag = entry
+    # no-cache: browsers may keep the body but must revalidate, which costs a 304
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+def stats():
+    with _lock:
+        return {"entries": len(_entries), "bytes": sum(len(body) for body, _ in _entries.values())}
+
+metrics.register(metrics.Gauge(
+    "api_response_cache", "Cached API responses.", ("stat",),
+    lambda: {(name,): value for name, value in stats().items()}))
@@ -0,0 +1,97 @@
+import logging
+import os
+import threading
+import numpy as np
+import pandas as pd
+
+from .weather import LAT, LON
+
+# Hourly solar geometry and clear-sky irradiance for the plant site, precomputed with
+# pvlib and memory-mapped. add_solar_features_ist looks rows up by hour offset and only
+# falls back to pvlib for other sites, off-hour timestamps or dates outside the table.
+TABLE_TZ = "Asia/Kolkata"
+TABLE_START = pd.Timestamp("2024-01-01 00:00", tz=TABLE_TZ)
+TABLE_YEARS = int(os.getenv("SOLAR_TABLE_YEARS", "6"))
+TABLE_ALTITUDE = 0
+
+COLUMNS = [
+    "solar_zenith", "solar_azimuth", "cos_zenith",
+    "hour_sin", "hour_cos", "day_sin", "day_cos", "clear_ghi"
+]
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+TABLE_PATH = os.getenv(
+    "SOLAR_TABLE_PATH",
+    os.path.join(os.path.dirname(APP_DIR), f"solar_table_{LAT:.4f}_{LON:.4f}_{TABLE_YEARS}y.npy")
+)
+
+_HOUR_NS = 3600 * 10**9
+
+_table = None
+_table_lock = threading.Lock()
+
+def table_index():
+    """Hourly timestamps covered by the table."""
+    end = TABLE_START + pd.DateOffset(years=TABLE_YEARS)
+    return pd.date_range(TABLE_START, end, freq="h", inclusive="left")
+
+def build_table(path=TABLE_PATH):
+    """Compute the table with pvlib and write it to `path` as a .npy file."""
+    from pvlib.location import Location
+
+    times = table_index()
+    site = Location(LAT, LON, altitude=TABLE_ALTITUDE, tz=TABLE_TZ)
+    solpos = site.get_solarposition(times)
+    clearsky = site.get_clearsky(times)
+
+    zenith = solpos["apparent_zenith"].to_numpy()
+    local_hour = times.hour + times.minute / 60
+    table = np.column_stack([
+        zenith,
+        solpos["azimuth"].to_numpy(),
+        np.cos(np.radians(zenith)).clip(min=0),
+        np.sin(2 * np.pi * local_hour / 24),
+        np.cos(2 * np.pi * local_hour / 24),
+        np.sin(2 * np.pi * times.dayofyear / 365.25),
+        np.cos(2 * np.pi * times.dayofyear / 365.25),
+        clearsky["ghi"].to_numpy(),
+    ])
+
+    # Write-then-rename so concurrent readers never see a partial file
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.save(f, table)
+    os.replace(tmp_path, path)
+    logging.info(f"Built solar table {path} ({len(times)} hours)")
+    return table
+
+def get_table():
+    """The memory-mapped table, built on first use if the file does not exist yet. None if unavailable."""
+    global _table
+    if _table is None:
+        with _table_lock:
+            if _table is None:
+                try:
+                    if not os.path.exists(TABLE_PATH):
+                        build_table()
+                    _table = np.load(TABLE_PATH, mmap_mode="r")
+                except Exception as e:
+                    logging.error(f"Solar table unavailable, using pvlib: {e}")
+                    _table = False
+    return _table if _table is not False else None
+
+def lookup(index, lat, lon, altitude=0, tz=TABLE_TZ):
+    """Table rows for a tz-aware hourly DatetimeIndex as a {column: ndarray} dict, or None if not covered."""
+    if (lat, lon, altitude, tz) != (LAT, LON, TABLE_ALTITUDE, TABLE_TZ) or len(index) == 0:
+        return None
+    table = get_table()
+    if table is None:
+        return None
+
+    offsets = index.asi8 - TABLE_START.value
+    positions = offsets // _HOUR_NS
+    if (offsets % _HOUR_NS).any() or positions.min() < 0 or positions.max() >= len(table):
+        return None
+
+    rows = table[positions]
+    return {name: rows[:, i] for i, name in enumerate(COLUMNS)}
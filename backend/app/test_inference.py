@@ -4,10 +4,12 @@ from datetime import datetime
 
 # Import from app package
 from app import prediction
+from app.registry import registry
 
 def test():
-    print(f"LGBM Features defined in models: {prediction.lgbm_features}")
-    print(f"Number of LGBM features: {len(prediction.lgbm_features)}")
+    lgbm_features = registry.active("lgbm").features
+    print(f"LGBM Features defined in models: {lgbm_features}")
+    print(f"Number of LGBM features: {len(lgbm_features)}")
     
     date_str = "2026-02-10"
     print(f"Testing LSTM for {date_str}...")
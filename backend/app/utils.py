@@ -2,8 +2,9 @@
 import numpy as np
 import pandas as pd
 from pvlib.location import Location
-from pvlib.irradiance import erbs, get_total_irradiance
+from . import metrics, solar_table
 
+@metrics.instrument("solar_features")
 def add_solar_features_ist(df, lat, lon, altitude=0, tz="Asia/Kolkata", tilt=12, azimuth=180):
     if not isinstance(df.index, pd.DatetimeIndex):
         df["timestamp"] = pd.to_datetime(df["timestamp"])
@@ -14,47 +15,93 @@ def add_solar_features_ist(df, lat, lon, altitude=0, tz="Asia/Kolkata", tilt=12,
     else:
         df.index = df.index.tz_convert(tz)
 
-    site = Location(lat, lon, altitude=altitude, tz=tz)
+    # Precomputed site table first; pvlib only for other sites or uncovered timestamps
+    geometry = solar_table.lookup(df.index.as_unit("ns"), lat, lon, altitude, tz)
+    if geometry is not None:
+        for name, values in geometry.items():
+            df[name] = values
+    else:
+        site = Location(lat, lon, altitude=altitude, tz=tz)
 
-    solpos = site.get_solarposition(df.index)
-    df["solar_zenith"] = solpos["apparent_zenith"]
-    df["solar_azimuth"] = solpos["azimuth"]  # Added
-    df["cos_zenith"] = np.cos(np.radians(df["solar_zenith"])).clip(lower=0)
+        solpos = site.get_solarposition(df.index)
+        df["solar_zenith"] = solpos["apparent_zenith"]
+        df["solar_azimuth"] = solpos["azimuth"]  # Added
+        df["cos_zenith"] = np.cos(np.radians(df["solar_zenith"])).clip(lower=0)
 
-    local_hour = df.index.hour + df.index.minute / 60
-    df["hour_sin"] = np.sin(2 * np.pi * local_hour / 24)
-    df["hour_cos"] = np.cos(2 * np.pi * local_hour / 24)
+        local_hour = df.index.hour + df.index.minute / 60
+        df["hour_sin"] = np.sin(2 * np.pi * local_hour / 24)
+        df["hour_cos"] = np.cos(2 * np.pi * local_hour / 24)
 
-    df["day_sin"] = np.sin(2 * np.pi * df.index.dayofyear / 365.25)
-    df["day_cos"] = np.cos(2 * np.pi * df.index.dayofyear / 365.25)
+        df["day_sin"] = np.sin(2 * np.pi * df.index.dayofyear / 365.25)
+        df["day_cos"] = np.cos(2 * np.pi * df.index.dayofyear / 365.25)
 
-    clearsky = site.get_clearsky(df.index)
-    df["clear_ghi"] = clearsky["ghi"]
+        clearsky = site.get_clearsky(df.index)
+        df["clear_ghi"] = clearsky["ghi"]
 
     df["kt"] = (df["ghi"] / df["clear_ghi"]).replace([np.inf, -np.inf], 0).fillna(0)
     df["ghi_clear_weighted"] = df["clear_ghi"] * df["cos_zenith"]
 
     # POA calculation (only if ghi_pred exists, otherwise skip)
     if 'ghi_pred' in df.columns:
-        # Decompose GHI into DNI and DHI
-        decomposed = erbs(
-            ghi=df['ghi_pred'],
-            zenith=df['solar_zenith'],
-            datetime_or_doy=df.index.dayofyear
-        )
-        df['dni_est'] = decomposed['dni']
-        df['dhi_est'] = decomposed['dhi']
-
-        # Calculate POA irradiance
-        poa = get_total_irradiance(
-            surface_tilt=tilt,
-            surface_azimuth=azimuth,
-            solar_zenith=df['solar_zenith'],
-            solar_azimuth=df['solar_azimuth'],
-            dni=df['dni_est'],
-            ghi=df['ghi_pred'],
-            dhi=df['dhi_est']
-        )
-        df['poa_irradiance'] = poa['poa_global'].clip(lower=0, upper=1200)
-
-    return df
\ No newline at end of file
+        df = add_poa_irradiance(df, tilt=tilt, azimuth=azimuth)
+
+    return df
+
+def add_poa_irradiance(df, tilt=12, azimuth=180):
+    """Add dni_est/dhi_est/poa_irradiance from 'ghi_pred' on a frame already run through add_solar_features_ist."""
+    poa, dni, dhi = erbs_poa(
+        df['ghi_pred'].to_numpy(dtype=float),
+        df['solar_zenith'].to_numpy(dtype=float),
+        df['solar_azimuth'].to_numpy(dtype=float),
+        df.index.dayofyear.to_numpy(),
+        tilt=tilt,
+        surface_azimuth=azimuth
+    )
+    df['dni_est'] = dni
+    df['dhi_est'] = dhi
+    df['poa_irradiance'] = poa
+
+    return df
+
+def erbs_poa(ghi, zenith, azimuth, doy, tilt=12, surface_azimuth=180, albedo=0.25):
+    """Erbs GHI decomposition and isotropic plane-of-array transposition on plain arrays.
+
+    Reproduces pvlib's erbs() + get_total_irradiance(model='isotropic') with their
+    default parameters. Inputs broadcast, so 2-D (day, hour) arrays work as well as
+    1-D series. Returns (poa_global clipped to [0, 1200], dni, dhi).
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cos_zenith = np.cos(np.radians(zenith))
+
+        # Extraterrestrial irradiance (Spencer) and clearness index
+        day_angle = (2. * np.pi / 365.) * (doy - 1)
+        dni_extra = 1366.1 * (1.00011 + 0.034221 * np.cos(day_angle) + 0.00128 * np.sin(day_angle) +
+                              0.000719 * np.cos(2 * day_angle) + 7.7e-05 * np.sin(2 * day_angle))
+        kt = ghi / (dni_extra * np.maximum(cos_zenith, 0.065))
+        kt = np.minimum(np.maximum(kt, 0), 1)
+
+        # Erbs diffuse fraction
+        diffuse_fraction = 1 - 0.09 * kt
+        diffuse_fraction = np.where((kt > 0.22) & (kt <= 0.8),
+                                    0.9511 - 0.1604 * kt + 4.388 * kt ** 2 -
+                                    16.638 * kt ** 3 + 12.336 * kt ** 4,
+                                    diffuse_fraction)
+        diffuse_fraction = np.where(kt > 0.8, 0.165, diffuse_fraction)
+
+        dhi = diffuse_fraction * ghi
+        dni = (ghi - dhi) / cos_zenith
+        bad_values = (zenith > 87) | (ghi < 0) | (dni < 0)
+        dni = np.where(bad_values, 0, dni)
+        dhi = np.where(bad_values, ghi, dhi)
+
+        # Isotropic transposition onto the tilted plane
+        projection = (np.cos(np.radians(tilt)) * cos_zenith +
+                      np.sin(np.radians(tilt)) * np.sin(np.radians(zenith)) *
+                      np.cos(np.radians(azimuth - surface_azimuth)))
+        projection = np.clip(projection, -1, 1)
+        poa_direct = np.maximum(dni * projection, 0)
+        poa_sky_diffuse = dhi * (1 + np.cos(np.radians(tilt))) * 0.5
+        poa_ground_diffuse = ghi * albedo * (1 - np.cos(np.radians(tilt))) * 0.5
+        poa_global = poa_direct + (poa_sky_diffuse + poa_ground_diffuse)
+
+    return np.clip(poa_global, 0, 1200), dni, dhi
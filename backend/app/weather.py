@@ -0,0 +1,409 @@
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+import pandas as pd
+from datetime import datetime, timedelta
+import openmeteo_requests
+import requests_cache
+from requests.adapters import HTTPAdapter
+from retry_requests import retry
+
+from . import metrics
+
+# Plant site
+LAT = 10.7905
+LON = 78.7047
+
+ARCHIVE_URL = "https://archive-api.open-meteo.com/v1/archive"
+FORECAST_URL = "https://api.open-meteo.com/v1/forecast"
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# HTTP cache shared by the API and scripts regardless of their working directory
+HTTP_CACHE_PATH = os.getenv("OPEN_METEO_CACHE_PATH", os.path.join(os.path.dirname(APP_DIR), ".cache.sqlite"))
+HTTP_POOL_SIZE = int(os.getenv("OPEN_METEO_POOL_SIZE", "8"))
+HTTP_CACHE_MAX_MB = float(os.getenv("OPEN_METEO_CACHE_MAX_MB", "256"))
+
+# Per-endpoint cache policy: forecasts are revised upstream every hour or so, while
+# archive days older than ARCHIVE_FINAL_DAYS are final and cached permanently.
+FORECAST_CACHE_TTL = int(os.getenv("OPEN_METEO_FORECAST_TTL", "3600"))
+ARCHIVE_FINAL_DAYS = int(os.getenv("OPEN_METEO_ARCHIVE_FINAL_DAYS", "7"))
+
+_session = None
+_client = None
+_client_lock = threading.Lock()
+
+def get_client():
+    """Process-wide Open-Meteo client, created on first use and shared by all threads.
+
+    One CachedSession keeps the SQLite cache open and reuses pooled keep-alive
+    connections across requests instead of paying cache-open and TLS setup per fetch.
+    """
+    global _client, _session
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                session = requests_cache.CachedSession(HTTP_CACHE_PATH, expire_after=FORECAST_CACHE_TTL)
+                retry(session, retries=5, backoff_factor=0.2)
+                # Keep retry's policy but size the connection pool for concurrent callers
+                adapter = HTTPAdapter(
+                    max_retries=session.get_adapter("https://").max_retries,
+                    pool_connections=HTTP_POOL_SIZE,
+                    pool_maxsize=HTTP_POOL_SIZE,
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                session.hooks["response"].append(_count_cache_outcome)
+                _session = session
+                _client = openmeteo_requests.Client(session=session)
+                enforce_http_cache_limit()
+    return _client
+
+def _count_cache_outcome(response, *args, **kwargs):
+    # On a miss the hook also fires inside requests' own send, before the cache wraps the
+    # response and sets from_cache; only the final dispatch is counted.
+    from_cache = getattr(response, "from_cache", None)
+    if from_cache is None:
+        return
+    endpoint = "archive" if response.url.startswith(ARCHIVE_URL) else "forecast"
+    metrics.http_cache_requests.inc(endpoint, "hit" if from_cache else "miss")
+
+def _http_cache_hit_ratios():
+    counts = metrics.http_cache_requests.values()
+    ratios = {}
+    for endpoint in ("forecast", "archive"):
+        hits = counts.get((endpoint, "hit"), 0)
+        total = hits + counts.get((endpoint, "miss"), 0)
+        ratios[(endpoint,)] = hits / total if total else 0.0
+    return ratios
+
+metrics.register(metrics.Gauge(
+    "open_meteo_http_cache_hit_ratio", "Share of Open-Meteo requests served from the HTTP cache.",
+    ("endpoint",), _http_cache_hit_ratios))
+
+def cache_expiry(use_archive, end_date):
+    """HTTP cache lifetime for one request. The cache key already includes the date range."""
+    if use_archive:
+        end = datetime.strptime(end_date, "%Y-%m-%d").date()
+        if end <= datetime.now().date() - timedelta(days=ARCHIVE_FINAL_DAYS):
+            return requests_cache.NEVER_EXPIRE
+    return FORECAST_CACHE_TTL
+
+def http_cache_size():
+    return os.path.getsize(HTTP_CACHE_PATH) if os.path.exists(HTTP_CACHE_PATH) else 0
+
+def compact_http_cache(max_bytes=None):
+    """Delete expired responses, evict until the cache file fits max_bytes, then VACUUM.
+
+    Forecast responses are evicted soonest-to-expire first, permanent archive responses last.
+    Returns the file size in bytes before and after.
+    """
+    get_client()
+    cache = _session.cache
+    max_bytes = max_bytes if max_bytes is not None else int(HTTP_CACHE_MAX_MB * 1024 * 1024)
+    before = http_cache_size()
+
+    cache.delete(expired=True, vacuum=True)
+    while http_cache_size() > max_bytes:
+        count = len(cache.responses)
+        if count == 0:
+            break
+        # Drop a tenth of the remaining responses per pass, soonest to expire first. Archive
+        # entries never expire (NULL expires) and go only once no forecast is left.
+        batch = max(1, count // 10)
+        with cache.responses.connection() as con:
+            keys = [row[0] for row in con.execute(
+                f"SELECT key FROM {cache.responses.table_name} "
+                "ORDER BY expires IS NULL, expires LIMIT ?", (batch,))]
+        cache.delete(*keys, vacuum=False)
+        cache.responses.vacuum()
+
+    after = http_cache_size()
+    logging.info(f"HTTP cache compacted: {before / 1e6:.1f} MB -> {after / 1e6:.1f} MB")
+    return before, after
+
+def enforce_http_cache_limit():
+    """Compact the HTTP cache only if it has grown past OPEN_METEO_CACHE_MAX_MB."""
+    if http_cache_size() > HTTP_CACHE_MAX_MB * 1024 * 1024:
+        compact_http_cache()
+
+HOURLY_VARIABLES = [
+    "temperature_2m", "relative_humidity_2m", "wind_speed_10m",
+    "wind_direction_10m", "surface_pressure", "cloud_cover",
+    "total_column_integrated_water_vapour", "shortwave_radiation",
+    "direct_normal_irradiance", "diffuse_radiation"
+]
+
+@metrics.instrument("fetch_weather")
+def fetch_weather_data(lat, lon, start_date, end_date, use_archive=False):
+    """Fetch hourly weather data. use_archive=True for historical measurements, False for forecast/inference."""
+    openmeteo = get_client()
+    url = ARCHIVE_URL if use_archive else FORECAST_URL
+
+    params = {
+        "latitude": lat,
+        "longitude": lon,
+        "start_date": start_date,
+        "end_date": end_date,
+        "hourly": HOURLY_VARIABLES,
+        "timezone": "Asia/Kolkata"
+    }
+
+    responses = openmeteo.weather_api(url, params=params, expire_after=cache_expiry(use_archive, end_date))
+    response = responses[0]
+    hourly = response.Hourly()
+
+    timestamps = pd.date_range(
+        start=pd.to_datetime(hourly.Time(), unit="s", utc=True),
+        periods=len(hourly.Variables(0).ValuesAsNumpy()),
+        freq="h"
+    ).tz_convert("Asia/Kolkata")
+
+    df = pd.DataFrame({
+        "timestamp": timestamps,
+        "temperature": hourly.Variables(0).ValuesAsNumpy(),
+        "humidity": hourly.Variables(1).ValuesAsNumpy(),
+        "wind_speed": hourly.Variables(2).ValuesAsNumpy(),
+        "wind_direction": hourly.Variables(3).ValuesAsNumpy(),
+        "surface_pressure": hourly.Variables(4).ValuesAsNumpy(),
+        "cloud_cover": hourly.Variables(5).ValuesAsNumpy(),
+        "water_vapour": hourly.Variables(6).ValuesAsNumpy(),
+        "ghi": hourly.Variables(7).ValuesAsNumpy(),
+        "dni": hourly.Variables(8).ValuesAsNumpy(),
+        "dhi": hourly.Variables(9).ValuesAsNumpy(),
+    })
+    return df
+
+# Per-day frame cache
+FRAME_CACHE_SIZE = int(os.getenv("WEATHER_FRAME_CACHE_SIZE", "512"))
+FORECAST_FRAME_TTL = int(os.getenv("WEATHER_FORECAST_FRAME_TTL", str(FORECAST_CACHE_TTL)))
+
+class DayFrameCache:
+    """Bounded LRU of parsed, solar-enriched hourly frames keyed by (site, date, source).
+
+    Forecast entries expire after FORECAST_FRAME_TTL seconds since upstream forecasts
+    are revised; archive entries are kept until evicted. Lookups and evictions are
+    counted in metrics, so inference workers report theirs along with each call.
+    """
+
+    def __init__(self, maxsize=FRAME_CACHE_SIZE, forecast_ttl=FORECAST_FRAME_TTL):
+        self.maxsize = maxsize
+        self.forecast_ttl = forecast_ttl
+        self._frames = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._frames.get(key)
+            if entry is not None:
+                stored_at, frame = entry
+                source = key[2]
+                if source == "forecast" and time.monotonic() - stored_at > self.forecast_ttl:
+                    del self._frames[key]
+                    entry = None
+            if entry is None:
+                metrics.weather_frame_cache_requests.inc("miss")
+                return None
+            self._frames.move_to_end(key)
+            metrics.weather_frame_cache_requests.inc("hit")
+            return frame
+
+    def put(self, key, frame):
+        with self._lock:
+            self._frames[key] = (time.monotonic(), frame)
+            self._frames.move_to_end(key)
+            while len(self._frames) > self.maxsize:
+                self._frames.popitem(last=False)
+                metrics.weather_frame_cache_evictions.inc()
+
+    def clear(self):
+        with self._lock:
+            self._frames.clear()
+
+    def stats(self):
+        """Hits, misses and evictions of this process and every inference worker; size is
+        this process's cache only. Backfill stores frames but never looks them up, so it
+        does not count towards the hit ratio.
+        """
+        requests = metrics.weather_frame_cache_requests.values()
+        hits, misses = requests.get(("hit",), 0), requests.get(("miss",), 0)
+        with self._lock:
+            size = len(self._frames)
+        return {
+            "size": size,
+            "maxsize": self.maxsize,
+            "hits": hits,
+            "misses": misses,
+            "evictions": metrics.weather_frame_cache_evictions.values().get((), 0),
+            "hit_ratio": hits / (hits + misses) if hits + misses else 0.0,
+        }
+
+frame_cache = DayFrameCache()
+
+# Lookups and evictions are exported as counters; the gauge is the API process's size
+metrics.register(metrics.Gauge(
+    "weather_frame_cache", "Solar-enriched day frame cache size in the API process.",
+    ("stat",), lambda: {(name,): value for name, value in frame_cache.stats().items() if name in ("size", "maxsize")}))
+
+def slice_days(df, start_date, end_date):
+    """Return the rows of an hourly frame whose local date lies in [start_date, end_date]."""
+    if isinstance(df.index, pd.DatetimeIndex):
+        dates = df.index.date
+    else:
+        dates = df["timestamp"].dt.date
+    mask = (dates >= start_date) & (dates <= end_date)
+    return df.loc[mask]
+
+def load_weather_range(start_date, end_date, source="forecast", lat=LAT, lon=LON):
+    """Fetch [start_date, end_date] in one request, add solar features once, and cache each day.
+
+    Returns the enriched frame indexed by IST timestamp.
+    """
+    from .utils import add_solar_features_ist
+
+    df = fetch_weather_data(
+        lat, lon, start_date.strftime("%Y-%m-%d"), end_date.strftime("%Y-%m-%d"),
+        use_archive=(source == "archive")
+    )
+    df = add_solar_features_ist(df, lat, lon)
+    for day, frame in df.groupby(df.index.date):
+        if len(frame) == 24:
+            frame_cache.put((lat, lon, day, source), frame)
+    return df
+
+def get_weather_days(start_date, end_date, source="forecast", lat=LAT, lon=LON):
+    """Solar-enriched hourly frame for [start_date, end_date], served from the per-day cache.
+
+    Days not in the cache are fetched together in one request covering the first to the
+    last missing day. The returned frame is a copy and safe to modify.
+    """
+    n_days = (end_date - start_date).days + 1
+    days = [start_date + timedelta(days=i) for i in range(n_days)]
+    frames = {day: frame_cache.get((lat, lon, day, source)) for day in days}
+    missing = [day for day, frame in frames.items() if frame is None]
+    if missing:
+        df = load_weather_range(missing[0], missing[-1], source, lat, lon)
+        for day in missing:
+            frames[day] = slice_days(df, day, day)
+    return pd.concat([frames[day] for day in days])
+
+# Live conditions for /current-weather
+CURRENT_WEATHER_REFRESH = float(os.getenv("CURRENT_WEATHER_REFRESH_SECONDS", "600"))
+CURRENT_WEATHER_RETRY = float(os.getenv("CURRENT_WEATHER_RETRY_SECONDS", "60"))
+CURRENT_WEATHER_STALE_AFTER = float(os.getenv("CURRENT_WEATHER_STALE_SECONDS", str(2 * CURRENT_WEATHER_REFRESH)))
+CURRENT_WEATHER_FIELDS = ("temperature", "humidity", "wind_speed")
+
+class CurrentWeather:
+    """Today's hourly forecast conditions, refreshed by a background thread.
+
+    read() answers from memory with the row for the current hour, so requests never
+    wait on Open-Meteo. A failed refresh keeps the last good day and marks reads
+    stale until a refresh succeeds again; so does data older than
+    CURRENT_WEATHER_STALE_AFTER seconds or from a previous day.
+    """
+
+    def __init__(self, lat=LAT, lon=LON):
+        self.lat = lat
+        self.lon = lon
+        self.day = None
+        self.hours = None
+        self.fetched_at = None
+        self.error = None
+        self.failures = 0
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def refresh(self):
+        """Fetch today's forecast now; returns whether it succeeded.
+
+        A call made while another refresh is in flight waits for that one instead of
+        issuing a second upstream request.
+        """
+        if not self._refresh_lock.acquire(blocking=False):
+            with self._refresh_lock:
+                return self.error is None and self.hours is not None
+        try:
+            today = datetime.now().date()
+            date_str = today.strftime("%Y-%m-%d")
+            try:
+                df = fetch_weather_data(self.lat, self.lon, date_str, date_str, use_archive=False)
+                hours = [
+                    {
+                        **{name: float(getattr(row, name)) for name in CURRENT_WEATHER_FIELDS},
+                        "timestamp": row.timestamp.isoformat(),
+                    }
+                    for row in df.itertuples(index=False)
+                ]
+                if not hours:
+                    raise ValueError("empty forecast response")
+            except Exception as e:
+                logging.error(f"Current weather refresh failed: {e}")
+                with self._lock:
+                    self.error = str(e)
+                    self.failures += 1
+                return False
+            with self._lock:
+                self.day = today
+                self.hours = hours
+                self.fetched_at = time.time()
+                self.error = None
+            return True
+        finally:
+            self._refresh_lock.release()
+
+    def read(self):
+        """Current-hour conditions with age_seconds and stale flag; None before the first good fetch."""
+        with self._lock:
+            day, hours, fetched_at, error = self.day, self.hours, self.fetched_at, self.error
+        if hours is None:
+            return None
+        now = datetime.now()
+        # After midnight and before the next refresh, the last hour fetched is the newest known
+        row = hours[min(now.hour, len(hours) - 1)] if day == now.date() else hours[-1]
+        age = time.time() - fetched_at
+        return {
+            **row,
+            "fetched_at": datetime.fromtimestamp(fetched_at).isoformat(),
+            "age_seconds": round(age, 1),
+            "stale": error is not None or day != now.date() or age > CURRENT_WEATHER_STALE_AFTER,
+            "error": error,
+        }
+
+    def age(self):
+        with self._lock:
+            return time.time() - self.fetched_at if self.fetched_at is not None else None
+
+    def request_refresh(self):
+        """Wake the refresher thread to fetch now, without waiting for it."""
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            ok = self.refresh()
+            now = datetime.now()
+            # Wake up at midnight too, so the new day's rows are fetched right away
+            to_midnight = (datetime.combine(now.date() + timedelta(days=1), datetime.min.time()) - now).total_seconds()
+            self._wake.wait(min(CURRENT_WEATHER_REFRESH if ok else CURRENT_WEATHER_RETRY, to_midnight + 1))
+            self._wake.clear()
+
+    def start(self):
+        """Start the refresher thread (once)."""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="current-weather", daemon=True)
+                self._thread.start()
+        return self._thread
+
+current_weather = CurrentWeather()
+
+def _current_weather_age():
+    age = current_weather.age()
+    return {(): age} if age is not None else {}
+
+metrics.register(metrics.Gauge(
+    "current_weather_age_seconds", "Age of the live weather snapshot served by /current-weather.",
+    (), _current_weather_age))
@@ -0,0 +1,16 @@
+import argparse
+
+from app import weather
+
+def compact():
+    parser = argparse.ArgumentParser(description="Compact the Open-Meteo HTTP cache file.")
+    parser.add_argument("--max-mb", type=float, default=weather.HTTP_CACHE_MAX_MB,
+                        help="Evict responses until the cache file is at most this size")
+    args = parser.parse_args()
+
+    print("Cache file:", weather.HTTP_CACHE_PATH)
+    before, after = weather.compact_http_cache(max_bytes=int(args.max_mb * 1024 * 1024))
+    print(f"Size: {before / 1e6:.1f} MB -> {after / 1e6:.1f} MB")
+
+if __name__ == "__main__":
+    compact()
@@ -0,0 +1,35 @@
+import os
+import numpy as np
+import pytest
+
+from app import lstm_numpy
+
+MODELS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend", "models")
+TOLERANCE = 1e-5
+
+def test_lstm_parity():
+    """Compare the NumPy LSTM forward pass with Keras on random batches for every saved model."""
+    tf = pytest.importorskip("tensorflow")
+
+    rng = np.random.default_rng(42)
+    names = sorted(n for n in os.listdir(MODELS_DIR) if n.endswith((".h5", ".keras")))
+    failures = 0
+    for name in names:
+        path = os.path.join(MODELS_DIR, name)
+        keras_model = tf.keras.models.load_model(path, compile=False)
+        numpy_model = lstm_numpy.load_model(path)
+
+        _, steps, n_features = keras_model.input_shape
+        x = rng.standard_normal((16, steps or 48, n_features)).astype(np.float32)
+        expected = keras_model.predict(x, verbose=0)
+        actual = numpy_model.predict(x)
+        max_diff = float(np.max(np.abs(expected - actual)))
+
+        status = "OK" if max_diff <= TOLERANCE else "MISMATCH"
+        failures += status != "OK"
+        print(f"{name}: max |keras - numpy| = {max_diff:.2e} [{status}]")
+
+    assert failures == 0, f"{failures} model(s) exceed tolerance {TOLERANCE}"
+
+if __name__ == "__main__":
+    test_lstm_parity()
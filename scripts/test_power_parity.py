@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+from pvlib.irradiance import erbs, get_total_irradiance
+
+from app import prediction
+from app.weather import LAT, LON
+from app.utils import add_solar_features_ist
+
+POA_TOLERANCE = 1e-6
+POWER_TOLERANCE = 1e-9
+
+def reference_power(df, tilt=prediction.TILT, azimuth=180):
+    """POA and power through pvlib and pandas, as computed before the fused kernel."""
+    decomposed = erbs(ghi=df["ghi_pred"], zenith=df["solar_zenith"], datetime_or_doy=df.index.dayofyear)
+    poa = get_total_irradiance(
+        surface_tilt=tilt,
+        surface_azimuth=azimuth,
+        solar_zenith=df["solar_zenith"],
+        solar_azimuth=df["solar_azimuth"],
+        dni=decomposed["dni"],
+        ghi=df["ghi_pred"],
+        dhi=decomposed["dhi"],
+    )["poa_global"].clip(lower=0, upper=1200)
+
+    cutoff = poa.where(90 - df["solar_zenith"] >= prediction.SUN_ELEVATION_LIMIT, 0)
+    cell_temperature = df["temperature"] + (prediction.NOCT - 20) / 800 * cutoff
+    temp_factor = 1 + prediction.TEMP_COEFF * (cell_temperature - 25)
+    power = (cutoff * prediction.TOTAL_PV_AREA * prediction.PV_EFFICIENCY * temp_factor * prediction.DERATE) / 1e6
+    return poa, power.clip(lower=0)
+
+def test_power_parity():
+    """Compare add_power with the pvlib/pandas path on a year of synthetic hourly GHI."""
+    rng = np.random.default_rng(42)
+    timestamps = pd.date_range("2025-01-01", "2025-12-31 23:00", freq="h")
+    df = pd.DataFrame({
+        "timestamp": timestamps,
+        "ghi": rng.uniform(0, 1100, len(timestamps)),
+        "temperature": rng.uniform(18, 42, len(timestamps)),
+    })
+    df = add_solar_features_ist(df, LAT, LON)
+    # Model output is float32; missing predictions and weather must stay missing in the same rows
+    df["ghi_pred"] = rng.uniform(-5, 1100, len(df)).astype(np.float32)
+    df.iloc[rng.choice(len(df), 50, replace=False), df.columns.get_loc("ghi_pred")] = np.nan
+    df.iloc[rng.choice(len(df), 50, replace=False), df.columns.get_loc("temperature")] = np.nan
+
+    expected_poa, expected_power = reference_power(df)
+    actual = prediction.add_power(df.copy())
+
+    for column, expected, tolerance in (
+        ("poa_irradiance", expected_poa, POA_TOLERANCE),
+        ("power", expected_power, POWER_TOLERANCE),
+    ):
+        values = actual[column].to_numpy()
+        assert np.array_equal(np.isnan(values), np.isnan(expected.to_numpy())), f"{column}: NaN rows differ"
+        max_diff = float(np.nanmax(np.abs(values - expected.to_numpy())))
+        print(f"{column}: max |pandas - kernel| = {max_diff:.2e}")
+        assert max_diff <= tolerance, f"{column} differs by {max_diff:.2e} (tolerance {tolerance})"
+
+if __name__ == "__main__":
+    test_power_parity()